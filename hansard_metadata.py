@@ -0,0 +1,33 @@
+"""
+Speaker metadata lookup shared by the indexing pipelines
+"""
+import os
+import json
+from functools import lru_cache
+
+# os.walk reaches a hansard directory and its _questions child together, so
+# only the last few directories' speakers.json are worth keeping
+@lru_cache(maxsize=8)
+def load_speakers_json(directory):
+    """Load a directory's speakers.json, keyed by page path, or {} without one"""
+    speakers_file = os.path.join(directory, 'speakers.json')
+    if not os.path.exists(speakers_file):
+        return {}
+    with open(speakers_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def read_metadata_content(html_file_path):
+    """Metadata text for a page, from its _metadata.txt or the hansard's speakers.json"""
+    metadata_file_path = html_file_path[:-len('.html')] + '_metadata.txt'
+    if os.path.exists(metadata_file_path):
+        with open(metadata_file_path, 'r', encoding='utf-8') as metadata_file:
+            return metadata_file.read()
+
+    # Fall back to speakers.json; question pages sit one level below the hansard directory
+    directory = os.path.dirname(html_file_path)
+    for hansard_dir in (directory, os.path.dirname(directory)):
+        page_path = os.path.relpath(html_file_path, hansard_dir).replace(os.sep, '/')
+        speakers = load_speakers_json(hansard_dir).get(page_path)
+        if speakers is not None:
+            return "Speakers:\n" + "".join(f"Speaker {i}: {speaker}\n" for i, speaker in enumerate(speakers, 1))
+    return None
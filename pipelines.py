@@ -2,6 +2,7 @@ import re
 from bs4 import BeautifulSoup
 import json
 from datetime import datetime
+from hansard_metadata import read_metadata_content
 import mysql.connector
 import pysolr
 import os
@@ -197,18 +198,15 @@ def index_in_solr(data):
         print(f"Problematic document: {data}")
 
 
-def process_document(html_file_path, metadata_file_path):
+def process_document(html_file_path, metadata_content):
     try:
         with open(html_file_path, 'r', encoding='utf-8') as html_file:
             html_content = html_file.read()
 
-        with open(metadata_file_path, 'r', encoding='utf-8') as metadata_file:
-            metadata_content = metadata_file.read()
-
         parsed_data = parse_hansard_document(html_content, metadata_content, html_file_path)
         return parsed_data
     except FileNotFoundError:
-        print(f"File not found: {html_file_path} or {metadata_file_path}")
+        print(f"File not found: {html_file_path}")
     except Exception as e:
         print(f"Error processing {html_file_path}: {str(e)}")
     return None
@@ -219,9 +217,9 @@ def process_all_documents(directory):
         for filename in files:
             if filename.endswith(".html") and filename != "contents.html":
                 html_file = os.path.join(root, filename)
-                metadata_file = os.path.join(root, filename.replace('.html', '_metadata.txt'))
-                if os.path.exists(metadata_file):
-                    parsed_data = process_document(html_file, metadata_file)
+                metadata_content = read_metadata_content(html_file)
+                if metadata_content is not None:
+                    parsed_data = process_document(html_file, metadata_content)
                     if parsed_data:
                         # Assign order based on the title match in contents_order
                         parsed_data['order'] = contents_order.get(parsed_data['title'], 9999)
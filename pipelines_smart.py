@@ -11,7 +11,8 @@ from pipelines_enhanced import (
     extract_date_from_path,
     create_mysql_table,
     insert_into_mysql,
-    index_in_solr
+    index_in_solr,
+    read_metadata_content
 )
 
 def get_file_hash(filepath):
@@ -91,9 +92,9 @@ def smart_index_documents(directory):
         for filename in files:
             if filename.endswith(".html") and filename != "contents.html":
                 html_file = os.path.join(root, filename)
-                metadata_file = os.path.join(root, filename.replace('.html', '_metadata.txt'))
+                metadata_content = read_metadata_content(html_file)
                 
-                if os.path.exists(metadata_file):
+                if metadata_content is not None:
                     # Check if already indexed
                     file_hash = get_file_hash(html_file)
                     
@@ -105,8 +106,6 @@ def smart_index_documents(directory):
                     try:
                         with open(html_file, 'r', encoding='utf-8') as f:
                             html_content = f.read()
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            metadata_content = f.read()
                         
                         parsed_data = parse_hansard_document(
                             html_content, metadata_content, html_file
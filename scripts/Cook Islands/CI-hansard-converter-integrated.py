@@ -2,6 +2,7 @@ import re
 import os
 from bs4 import BeautifulSoup
 import logging
+from functools import lru_cache
 from datetime import datetime
 import json
 
@@ -11,14 +12,15 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Configuration
 COLLECTIONS_BASE = "/Users/jacksonkeet/Pacific Hansard Development/collections/Cook Islands"
 
+@lru_cache(maxsize=4096)
 def normalize_name(name):
     """Remove all spaces and convert to uppercase for comparison"""
     return ''.join(name.split()).upper()
 
 def extract_and_clean_speakers(text):
     """Extract all unique speakers from the text with comprehensive pattern matching"""
-    speakers = []
-    seen = set()
+    # Normalized name -> first display form seen
+    speakers = {}
     
     # Comprehensive patterns to capture all speaker formats
     patterns = [
@@ -59,16 +61,13 @@ def extract_and_clean_speakers(text):
             
             # Filter out noise
             if (normalized_name and 
-                normalized_name not in seen and 
                 len(normalized_name) > 2 and
                 not normalized_name.isdigit() and
                 not all(c in '.,!?;:' for c in normalized_name)):
-                seen.add(normalized_name)
-                speakers.append(name)
+                speakers.setdefault(normalized_name, name)
     
     # Sort speakers for consistency
-    speakers.sort()
-    return speakers
+    return sorted(speakers.values())
 
 def write_speakers_metadata(file_path, speakers):
     """Write speaker metadata to appropriate file"""
@@ -97,28 +96,22 @@ def clean_content(content):
     """Clean HTML content while preserving structure"""
     soup = BeautifulSoup(content, 'html.parser')
     
-    # Remove all style attributes
-    for tag in soup.find_all(style=True):
-        del tag['style']
-    
-    # Remove all class attributes
-    for tag in soup.find_all(class_=True):
-        del tag['class']
-    
-    # Preserve line breaks
-    for br in soup.find_all("br"):
-        br.replace_with("\n")
+    # One traversal preserves line breaks and strips attributes; images
+    # keep everything but style and class
+    for tag in soup.find_all(True):
+        if tag.name == 'br':
+            tag.replace_with("\n")
+        elif tag.name == 'img':
+            tag.attrs.pop('style', None)
+            tag.attrs.pop('class', None)
+        else:
+            tag.attrs = {}
     
     # Remove empty tags
     for tag in soup.find_all():
         if len(tag.get_text(strip=True)) == 0 and tag.name not in ['br', 'img']:
             tag.decompose()
     
-    # Remove any remaining attributes except 'src' for images
-    for tag in soup.find_all():
-        if tag.name != 'img':
-            tag.attrs = {}
-    
     return str(soup)
 
 def extract_date_info(filename, content_soup):
@@ -174,6 +167,11 @@ def extract_date_info(filename, content_soup):
     
     return None, None, None
 
+# A speaker line that may open a question, and the words that confirm one
+QUESTION_SPEAKER_PATTERN = re.compile(r'^(MR|MRS|MS|HON|DR)\.?\s+[A-Z].*?:')
+QUESTION_START_CONTEXT_PATTERN = re.compile(r'\bquestion\b|\basking\b|\bask\b', re.IGNORECASE)
+QUESTION_END_CONTEXT_PATTERN = re.compile(r'\bquestion\b|\basking\b', re.IGNORECASE)
+
 def extract_questions(content, part_number, directory):
     """Extract oral and written questions from content"""
     soup = BeautifulSoup(content, 'html.parser')
@@ -190,8 +188,10 @@ def extract_questions(content, part_number, directory):
     
     question_type = "oral" if is_oral_section else "written"
     
-    # Get all elements
+    # Get all elements and extract each one's text once; the look-ahead
+    # windows below reuse these instead of re-walking the subtrees
     all_elements = soup.find_all(['p', 'div'])
+    texts = [element.get_text() for element in all_elements]
     
     # Identify question boundaries
     question_starts = []
@@ -199,13 +199,13 @@ def extract_questions(content, part_number, directory):
     in_question = False
     
     for i, element in enumerate(all_elements):
-        elem_text = element.get_text().strip()
+        elem_text = texts[i].strip()
         
         # Check if this is a new question starting
-        if re.match(r'^(MR|MRS|MS|HON|DR)\.?\s+[A-Z].*?:', elem_text):
+        if QUESTION_SPEAKER_PATTERN.match(elem_text):
             # Check if "question" appears in the next few lines
-            context_text = ' '.join(el.get_text() for el in all_elements[i:min(i+5, len(all_elements))])
-            if re.search(r'\bquestion\b|\basking\b|\bask\b', context_text, re.IGNORECASE):
+            context_text = ' '.join(texts[i:i+5])
+            if QUESTION_START_CONTEXT_PATTERN.search(context_text):
                 if current_question:
                     questions.append({
                         'type': question_type,
@@ -220,9 +220,9 @@ def extract_questions(content, part_number, directory):
             
             # Check if we've reached the end of this Q&A exchange
             if i + 1 < len(all_elements):
-                next_text = all_elements[i + 1].get_text().strip()
-                if (re.match(r'^(MR|MRS|MS|HON|DR)\.?\s+[A-Z].*?:', next_text) and 
-                    re.search(r'\bquestion\b|\basking\b', ' '.join(el.get_text() for el in all_elements[i+1:min(i+6, len(all_elements))]), re.IGNORECASE)):
+                next_text = texts[i + 1].strip()
+                if (QUESTION_SPEAKER_PATTERN.match(next_text) and 
+                    QUESTION_END_CONTEXT_PATTERN.search(' '.join(texts[i+1:i+6]))):
                     in_question = False
     
     # Don't forget the last question
@@ -309,6 +309,8 @@ def extract_metadata_from_content(soup, filename):
 
 def split_html(filename):
     """Main function to split HTML hansard into parts and save to collections structure"""
+    # The date fallback and the metadata read the whole document's text, so
+    # the full tree is needed here, not just the styled divs
     with open(filename, "r", encoding='utf-8') as file:
         soup = BeautifulSoup(file, 'html.parser')
     
@@ -343,38 +345,21 @@ def split_html(filename):
     
     all_divs = soup.find_all('div', style=True)
     
-    # Create contents file
-    contents_filename = os.path.join(directory_name, "contents.html")
-    with open(contents_filename, "w", encoding='utf-8') as file:
-        file.write("<h2>Contents</h2>\n<ul>")
-    
     current_part = []
     part_number = 0
     contents_list = []
     current_part_title = ""
     all_questions = []
     
-    # Patterns for section headers
-    header_patterns = [
-        lambda div: div.find('span', {'style': lambda v: v and 'Bold' in v and 'font-size:12px' in v}),
-        lambda div: div.text.strip().isupper() and len(div.text.strip()) > 3,
-        lambda div: re.match(r'^[A-Z\s]+$', div.text.strip()) and len(div.text.strip().split()) > 1
-    ]
-    
     for i, div in enumerate(all_divs):
-        is_header = False
-        
-        # Check if this is a section header
-        for pattern in header_patterns:
-            if pattern(div):
-                text = div.text.strip()
-                # Additional validation for headers
-                if (len(text) > 3 and 
-                    text.isupper() and 
-                    not re.match(r'^\d+$', text) and
-                    not text.startswith('PAGE')):
-                    is_header = True
-                    break
+        # Check if this is a section header. The all-caps validation is
+        # stricter than the bold-span and caps-words heuristics, so it is
+        # the only test that can decide the outcome.
+        text = div.text.strip()
+        is_header = (len(text) > 3 and
+                     text.isupper() and
+                     not re.match(r'^\d+$', text) and
+                     not text.startswith('PAGE'))
         
         if is_header:
             # Save previous part if exists
@@ -399,11 +384,8 @@ def split_html(filename):
             # Start new part
             part_number += 1
             current_part = [div]
-            current_part_title = div.text.strip()
+            current_part_title = text
             contents_list.append(current_part_title)
-            
-            with open(contents_filename, "a", encoding='utf-8') as file:
-                file.write(f"<li>{current_part_title}</li>\n")
         else:
             current_part.append(div)
     
@@ -426,8 +408,12 @@ def split_html(filename):
     for question in all_questions:
         write_question_file(directory_name, question)
     
-    with open(contents_filename, "a", encoding='utf-8') as file:
-        file.write("</ul>")
+    # Write the contents file in one go now that all titles are known
+    contents = ["<h2>Contents</h2>\n<ul>"]
+    contents.extend(f"<li>{title}</li>\n" for title in contents_list)
+    contents.append("</ul>")
+    with open(os.path.join(directory_name, "contents.html"), "w", encoding='utf-8') as file:
+        file.write(''.join(contents))
     
     # Create validation report
     validation_report = {
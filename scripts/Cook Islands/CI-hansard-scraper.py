@@ -18,6 +18,15 @@ import hashlib
 import json
 from urllib.parse import urljoin
 import http.cookiejar as cookielib
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    import pycurl
+except ImportError:
+    pycurl = None
 
 # Configure logging first so we can use it during imports
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -83,10 +92,70 @@ DATA_DIR = os.path.join(SCRIPT_DIR, 'data')
 
 # File to store processed hansards (to avoid reprocessing)
 PROCESSED_FILE = os.path.join(DATA_DIR, 'processed_hansards.json')
+# Newly processed hansards between saves of that file
+PROCESSED_SAVE_INTERVAL = 10
+# Downloads queued ahead of the PDF being converted
+PREFETCH_WINDOW = 2
 
 # URL of the Cook Islands Parliament Hansard Library
 HANSARD_URL = "https://parliament.gov.ck/hansard-library/"
 
+# curl and wget write straight to their output files; only stderr is kept,
+# and it is decoded just when a command fails
+DOWNLOAD_PROCESS_TIMEOUT = 120
+
+# One keep-alive session for the requests-based page fetch and downloads, so
+# cookies and the TLS connection carry over between them; throttling and
+# transient server errors are retried with backoff, honouring Retry-After
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                      max_retries=Retry(total=5, backoff_factor=1,
+                                                        status_forcelist=[429, 500, 502, 503, 504],
+                                                        respect_retry_after_header=True)))
+
+# With pycurl installed, curl fetches run in-process on one reused handle that
+# keeps its connections, TLS sessions and DNS cache between calls, rather than
+# starting a curl process per request. Page fetches and downloads never
+# overlap, so the handle is never used from two threads at once
+if pycurl is not None:
+    CURL = pycurl.Curl()
+    CURL.setopt(pycurl.FOLLOWLOCATION, True)
+    CURL.setopt(pycurl.NOSIGNAL, 1)
+else:
+    CURL = None
+
+def curl_download(url, filepath, headers, connect_timeout=30, max_time=60, retries=0):
+    """Fetch url into filepath with curl, returning None on success or an error message"""
+    if CURL is None:
+        import subprocess
+        curl_cmd = ['curl', '-sS', '-L', '-o', filepath,
+                    '--connect-timeout', str(connect_timeout), '--max-time', str(max_time)]
+        if retries:
+            curl_cmd += ['--retry', str(retries), '--retry-delay', '2']
+        for header in headers:
+            curl_cmd += ['-H', header]
+        curl_cmd.append(url)
+        
+        result = subprocess.run(curl_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                timeout=DOWNLOAD_PROCESS_TIMEOUT)
+        return result.stderr.decode(errors='replace') if result.returncode != 0 else None
+    
+    CURL.setopt(pycurl.URL, url)
+    CURL.setopt(pycurl.HTTPHEADER, headers)
+    CURL.setopt(pycurl.CONNECTTIMEOUT, connect_timeout)
+    CURL.setopt(pycurl.TIMEOUT, max_time)
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(random.uniform(1.5, 3))
+        try:
+            with open(filepath, 'wb') as f:
+                CURL.setopt(pycurl.WRITEDATA, f)
+                CURL.perform()
+            return None
+        except pycurl.error as e:
+            error = str(e)
+    return error
+
 def setup_directories():
     """Create necessary directories if they don't exist."""
     for directory in [PDF_DIR, HTML_DIR, PROCESSED_DIR, DATA_DIR]:
@@ -107,8 +176,11 @@ def load_processed_hansards():
 
 def save_processed_hansards(processed_hansards):
     """Save the list of processed hansards."""
-    with open(PROCESSED_FILE, 'w') as f:
+    # Write aside and swap in, so an interrupted save never truncates the record
+    temp_file = f"{PROCESSED_FILE}.tmp"
+    with open(temp_file, 'w') as f:
         json.dump(processed_hansards, f, indent=2)
+    os.replace(temp_file, PROCESSED_FILE)
 
 def get_browser_headers():
     """
@@ -297,39 +369,22 @@ def get_hansard_pdfs():
     # Method 1: Use curl command line tool as it seems to work better
     try:
         logger.info("Method 1: Using curl command line tool")
-        import subprocess
-        import tempfile
-        
-        # Create a temporary file for the HTML
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False) as tmp:
-            temp_file = tmp.name
-        
-        # Use curl to fetch the page
-        curl_cmd = [
-            'curl', '-s', '-L',
-            '-H', 'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.3 Safari/605.1.15',
-            '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            '-H', 'Accept-Language: en-US,en;q=0.9',
-            '-H', 'Accept-Encoding: gzip, deflate, br',
-            '-H', 'Referer: https://www.google.com',
-            '-o', temp_file,
-            HANSARD_URL
-        ]
         
-        result = subprocess.run(curl_cmd, capture_output=True, text=True)
+        # Fetch the page straight into the debug copy, so there is no temporary
+        # file to clean up if anything below fails
+        debug_file = os.path.join(LOG_DIR, "hansard_page_curl.html")
+        error = curl_download(HANSARD_URL, debug_file, [
+            'User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.3 Safari/605.1.15',
+            'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language: en-US,en;q=0.9',
+            'Accept-Encoding: gzip, deflate, br',
+            'Referer: https://www.google.com'
+        ], max_time=DOWNLOAD_PROCESS_TIMEOUT)
         
-        if result.returncode == 0:
+        if error is None:
             # Read the downloaded HTML
-            with open(temp_file, 'r', encoding='utf-8') as f:
+            with open(debug_file, 'r', encoding='utf-8') as f:
                 html_content = f.read()
-            
-            # Clean up temp file
-            os.unlink(temp_file)
-            
-            # Save for debugging
-            debug_file = os.path.join(LOG_DIR, "hansard_page_curl.html")
-            with open(debug_file, "w", encoding="utf-8") as f:
-                f.write(html_content)
             logger.info(f"Saved curl HTML to {debug_file}")
             
             # Check if content seems valid
@@ -337,7 +392,7 @@ def get_hansard_pdfs():
                 logger.info("Curl method returned valid HTML")
                 
                 # Parse the HTML
-                soup = BeautifulSoup(html_content, 'html.parser')
+                soup = BeautifulSoup(html_content, 'lxml')
                 
                 # Extract PDF links with improved logic
                 pdf_links = extract_pdf_links_improved(soup)
@@ -348,7 +403,7 @@ def get_hansard_pdfs():
             else:
                 logger.warning("Curl method returned invalid content")
         else:
-            logger.error(f"Curl command failed: {result.stderr}")
+            logger.error(f"Curl command failed: {error}")
             
     except Exception as e:
         logger.error(f"Curl method failed: {str(e)}")
@@ -357,8 +412,8 @@ def get_hansard_pdfs():
     try:
         logger.info("Method 2: Using requests library with improved headers")
         
-        # Use a session with all the necessary headers
-        session = requests.Session()
+        # Use the shared session with all the necessary headers
+        session = SESSION
         session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -376,7 +431,8 @@ def get_hansard_pdfs():
         
         # First visit the main site
         session.get('https://parliament.gov.ck/', timeout=30)
-        time.sleep(2)
+        # A varying pause reads less like a bot than a fixed one
+        time.sleep(random.uniform(0.8, 2.5))
         
         # Now get the hansard page
         response = session.get(HANSARD_URL, timeout=30)
@@ -393,7 +449,7 @@ def get_hansard_pdfs():
             logger.info("Requests method returned valid-looking HTML")
             
             # Parse the HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.text, 'lxml')
             
             # Extract PDF links
             pdf_links = extract_pdf_links_improved(soup)
@@ -533,7 +589,6 @@ def try_alternative_download(url, filepath, session):
     
     # Method 1: Use curl from the command line
     try:
-        import subprocess
         logger.info("Attempting download with curl...")
         
         # Get all cookies from the session as a cookie string
@@ -542,24 +597,15 @@ def try_alternative_download(url, filepath, session):
         # Create a user agent string
         user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"
         
-        # Build the curl command
-        curl_command = [
-            "curl", "-L", "-o", filepath,
-            "--connect-timeout", "30",
-            "--max-time", "60",
-            "--retry", "3",
-            "--retry-delay", "2",
-            "-H", f"User-Agent: {user_agent}",
-            "-H", f"Cookie: {cookie_header}",
-            "-H", f"Referer: {HANSARD_URL}",
-            url
-        ]
-        
-        # Execute curl command
-        result = subprocess.run(curl_command, capture_output=True, text=True)
+        # Download with curl
+        error = curl_download(url, filepath, [
+            f"User-Agent: {user_agent}",
+            f"Cookie: {cookie_header}",
+            f"Referer: {HANSARD_URL}"
+        ], retries=3)
         
         # Check if the download was successful
-        if result.returncode == 0 and os.path.exists(filepath) and os.path.getsize(filepath) > 1000:
+        if error is None and os.path.exists(filepath) and os.path.getsize(filepath) > 1000:
             # Verify it's a PDF
             with open(filepath, 'rb') as f:
                 header = f.read(4)
@@ -569,7 +615,7 @@ def try_alternative_download(url, filepath, session):
                 else:
                     logger.warning("File downloaded with curl is not a valid PDF")
         else:
-            logger.warning(f"Curl download failed: {result.stderr}")
+            logger.warning(f"Curl download failed: {error}")
     
     except Exception as e:
         logger.error(f"Error with curl download: {e}")
@@ -596,7 +642,8 @@ def try_alternative_download(url, filepath, session):
         ]
         
         # Execute wget command
-        result = subprocess.run(wget_command, capture_output=True, text=True)
+        result = subprocess.run(wget_command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                timeout=DOWNLOAD_PROCESS_TIMEOUT)
         
         # Clean up cookie file
         if os.path.exists(cookie_file):
@@ -613,7 +660,7 @@ def try_alternative_download(url, filepath, session):
                 else:
                     logger.warning("File downloaded with wget is not a valid PDF")
         else:
-            logger.warning(f"Wget download failed: {result.stderr}")
+            logger.warning(f"Wget download failed: {result.stderr.decode(errors='replace')}")
     
     except Exception as e:
         logger.error(f"Error with wget download: {e}")
@@ -650,25 +697,17 @@ def download_pdf(url, filename, session=None):
     
     # Method 1: Try curl first as it seems to work better
     try:
-        import subprocess
         logger.info("Attempting download with curl...")
         
-        # Build the curl command
-        curl_cmd = [
-            "curl", "-L", "-o", filepath,
-            "--connect-timeout", "30",
-            "--max-time", "60",
-            "-H", "User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "-H", f"Referer: {HANSARD_URL}",
-            "-H", "Accept: application/pdf,application/x-pdf,*/*",
-            url
-        ]
-        
-        # Execute curl command
-        result = subprocess.run(curl_cmd, capture_output=True, text=True)
+        # Download with curl
+        error = curl_download(url, filepath, [
+            "User-Agent: Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            f"Referer: {HANSARD_URL}",
+            "Accept: application/pdf,application/x-pdf,*/*"
+        ])
         
         # Check if the download was successful
-        if result.returncode == 0 and os.path.exists(filepath) and os.path.getsize(filepath) > 1000:
+        if error is None and os.path.exists(filepath) and os.path.getsize(filepath) > 1000:
             # Verify it's a PDF
             with open(filepath, 'rb') as f:
                 header = f.read(4)
@@ -679,7 +718,7 @@ def download_pdf(url, filename, session=None):
                     logger.warning("File downloaded with curl is not a valid PDF")
                     os.remove(filepath)
         else:
-            logger.warning(f"Curl download failed: {result.stderr}")
+            logger.warning(f"Curl download failed: {error}")
             if os.path.exists(filepath):
                 os.remove(filepath)
     
@@ -688,10 +727,8 @@ def download_pdf(url, filename, session=None):
     
     # Method 2: Standard requests download
     try:
-        # Use the session if provided
-        req = session 
-        if not req:
-            req = requests.Session()
+        # Use the session if provided, else the shared keep-alive one
+        req = session or SESSION
         
         # Generate browser-like headers
         headers = {
@@ -880,6 +917,16 @@ def run_indexing_pipeline(processed_dir):
         logger.error(f"Error running indexing pipeline: {e}")
         return False
 
+def fetch_hansard_pdf(index, pdf_url, filename):
+    """Download one hansard PDF after a polite pause; runs on the download thread."""
+    # Add a random delay between different PDFs to be nice to the server
+    if index > 0:
+        delay = 5 + 10 * random.random()  # Random delay between 5-15 seconds
+        logger.info(f"Waiting {delay:.2f} seconds before downloading next PDF...")
+        time.sleep(delay)
+    
+    return download_pdf(pdf_url, filename)
+
 def process_new_hansards():
     """Main function to process new hansards."""
     setup_directories()
@@ -898,6 +945,7 @@ def process_new_hansards():
     if total_to_process > 3:
         logger.info(f"Processing {total_to_process} PDFs with delays to avoid overloading the server.")
     
+    pending = []
     for i, (pdf_url, filename, date_str) in enumerate(pdf_links):
         # Generate a hash for the URL to use as an identifier
         pdf_hash = hashlib.md5(pdf_url.encode()).hexdigest()
@@ -907,49 +955,64 @@ def process_new_hansards():
             logger.info(f"Skipping already processed hansard: {filename}")
             continue
         
-        # Add progress information
-        logger.info(f"Processing PDF {i+1}/{len(pdf_links)}: {filename}")
-        
-        # Add a random delay between processing different PDFs to be nice to the server
-        if i > 0:
-            delay = 5 + 10 * random.random()  # Random delay between 5-15 seconds
-            logger.info(f"Waiting {delay:.2f} seconds before processing next PDF...")
-            time.sleep(delay)
-        
-        # Download the PDF
-        pdf_path = download_pdf(pdf_url, filename)
-        if not pdf_path:
-            logger.warning(f"Failed to download {filename}, skipping...")
-            continue
-        
-        # Convert PDF to HTML
-        html_path = convert_pdf_to_html(pdf_path)
-        if not html_path:
-            continue
-        
-        # Process the HTML
-        processed_dir = process_html(html_path)
-        if not processed_dir:
-            continue
-        
-        # Run indexing pipeline
-        # For now, we'll just log success without actually running it
-        success = True  # run_indexing_pipeline(processed_dir)
-        
-        if success:
-            # Record as processed
-            processed_hansards[pdf_hash] = {
-                'url': pdf_url,
-                'filename': filename,
-                'date': date_str,
-                'processed_dir': processed_dir,
-                'processed_date': datetime.now().isoformat()
-            }
-            newly_processed.append(filename)
-            logger.info(f"Successfully processed hansard: {filename}")
-        
-    # Save the updated processed hansards list
-    save_processed_hansards(processed_hansards)
+        pending.append((i, pdf_url, filename, date_str, pdf_hash))
+    
+    # Downloads stay one at a time with the same pacing, but run on a
+    # background thread so the next PDF arrives while this one is converted;
+    # only a small window is queued so downloads never run far ahead
+    to_fetch = iter(pending)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        downloads = deque((item, executor.submit(fetch_hansard_pdf, *item[:3]))
+                          for item in islice(to_fetch, PREFETCH_WINDOW))
+        try:
+            while downloads:
+                (i, pdf_url, filename, date_str, pdf_hash), download = downloads.popleft()
+                next_item = next(to_fetch, None)
+                if next_item is not None:
+                    downloads.append((next_item, executor.submit(fetch_hansard_pdf, *next_item[:3])))
+                
+                # Add progress information
+                logger.info(f"Processing PDF {i+1}/{len(pdf_links)}: {filename}")
+                
+                # Wait for the PDF's download
+                pdf_path = download.result()
+                if not pdf_path:
+                    logger.warning(f"Failed to download {filename}, skipping...")
+                    continue
+                
+                # Convert PDF to HTML
+                html_path = convert_pdf_to_html(pdf_path)
+                if not html_path:
+                    continue
+                
+                # Process the HTML
+                processed_dir = process_html(html_path)
+                if not processed_dir:
+                    continue
+                
+                # Run indexing pipeline
+                # For now, we'll just log success without actually running it
+                success = True  # run_indexing_pipeline(processed_dir)
+                
+                if success:
+                    # Record as processed
+                    processed_hansards[pdf_hash] = {
+                        'url': pdf_url,
+                        'filename': filename,
+                        'date': date_str,
+                        'processed_dir': processed_dir,
+                        'processed_date': datetime.now().isoformat()
+                    }
+                    newly_processed.append(filename)
+                    logger.info(f"Successfully processed hansard: {filename}")
+                
+                    # Checkpoint every few hansards rather than after each one
+                    if len(newly_processed) % PROCESSED_SAVE_INTERVAL == 0:
+                        save_processed_hansards(processed_hansards)
+        finally:
+            executor.shutdown(cancel_futures=True)
+            # Save the updated processed hansards list, even if a hansard failed hard
+            save_processed_hansards(processed_hansards)
     
     if newly_processed:
         logger.info(f"Newly processed hansards: {', '.join(newly_processed)}")
@@ -122,7 +122,8 @@ def generate_summary_report(results):
     modern_hansards = [r for r in results if 'DAY-' in r['file']]
     older_hansards = [r for r in results if 'DAY-' not in r['file']]
     
-    report = f"""
+    # Collect the report's sections and rows, joined once when it is written
+    report = [f"""
 # Cook Islands Hansard Processing Summary Report
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
@@ -137,53 +138,53 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 ## Format Analysis
 - Modern format (DAY-XX): {len(modern_hansards)} files
 - Older format: {len(older_hansards)} files
-"""
+"""]
 
     if modern_hansards:
         modern_questions = sum(r['questions_extracted'] for r in modern_hansards)
         modern_speakers = sum(r['unique_speakers'] for r in modern_hansards)
-        report += f"""
+        report.append(f"""
 ### Modern Format Performance:
 - Average questions: {modern_questions/len(modern_hansards):.1f}
 - Average speakers: {modern_speakers/len(modern_hansards):.1f}
-"""
+""")
 
     if older_hansards:
         older_questions = sum(r['questions_extracted'] for r in older_hansards)
         older_speakers = sum(r['unique_speakers'] for r in older_hansards)
-        report += f"""
+        report.append(f"""
 ### Older Format Performance:
 - Average questions: {older_questions/len(older_hansards):.1f}
 - Average speakers: {older_speakers/len(older_hansards):.1f}
-"""
+""")
 
     # Add detailed results table
-    report += """
+    report.append("""
 ## Detailed Results by File
 
 | File | Date | Parliament | Speakers | Questions | Coverage |
 |------|------|------------|----------|-----------|----------|
-"""
+""")
     
     for r in sorted(results, key=lambda x: x['file']):
-        report += f"| {r['file']} | {r['date']} | {r['parliament']} | {r['unique_speakers']} | {r['questions_extracted']} | {r['speaker_coverage']} |\n"
+        report.append(f"| {r['file']} | {r['date']} | {r['parliament']} | {r['unique_speakers']} | {r['questions_extracted']} | {r['speaker_coverage']} |\n")
     
     # Identify best and worst performing files
     best_speakers = max(results, key=lambda x: x['unique_speakers'])
     best_questions = max(results, key=lambda x: x['questions_extracted'])
     worst_speakers = min(results, key=lambda x: x['unique_speakers'])
     
-    report += f"""
+    report.append(f"""
 ## Notable Results
 - Most speakers identified: {best_speakers['file']} ({best_speakers['unique_speakers']} speakers)
 - Most questions extracted: {best_questions['file']} ({best_questions['questions_extracted']} questions)
 - Fewest speakers identified: {worst_speakers['file']} ({worst_speakers['unique_speakers']} speakers)
-"""
+""")
     
     # Save report
     report_file = f"processing_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
     with open(report_file, 'w') as f:
-        f.write(report)
+        f.write(''.join(report))
     
     logging.info(f"Summary report saved to {report_file}")
     
@@ -12,7 +12,6 @@ import subprocess
 from fiji_hansard_scraper import check_for_updates
 from pdfminer.high_level import extract_text_to_fp
 from pdfminer.layout import LAParams
-from io import StringIO
 
 # Setup logging
 logging.basicConfig(
@@ -24,21 +23,24 @@ logging.basicConfig(
     ]
 )
 
+# Hansards are single-column text, so skip pdfminer's text box reordering,
+# the most expensive layout pass, and keep vertical text detection off
+LAYOUT_PARAMS = LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+
 def pdf_to_html(pdf_path, html_path):
     """Convert PDF to HTML using pdfminer"""
     try:
-        output_string = StringIO()
-        with open(pdf_path, 'rb') as fin:
-            extract_text_to_fp(fin, output_string, laparams=LAParams(), 
-                             output_type='html', codec=None)
-        
-        with open(html_path, 'w', encoding='utf-8') as fout:
-            fout.write(output_string.getvalue())
+        # Stream the HTML straight to disk rather than building it in memory
+        with open(pdf_path, 'rb') as fin, open(html_path, 'wb') as fout:
+            extract_text_to_fp(fin, fout, laparams=LAYOUT_PARAMS, output_type='html', codec='utf-8')
         
         logging.info(f"Converted {pdf_path} to {html_path}")
         return True
     except Exception as e:
         logging.error(f"Error converting {pdf_path}: {str(e)}")
+        # Drop any partial output so it is not mistaken for a finished conversion
+        if os.path.exists(html_path):
+            os.remove(html_path)
         return False
 
 def process_new_hansards(new_files):
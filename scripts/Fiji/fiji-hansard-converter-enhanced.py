@@ -10,8 +10,10 @@ try:
     from bs4 import BeautifulSoup
 except ImportError:
     from BeautifulSoup import BeautifulSoup
+from lxml import etree
 from datetime import datetime
 import logging
+from functools import lru_cache
 
 # Setup logging
 logging.basicConfig(
@@ -22,35 +24,43 @@ logging.basicConfig(
 # Base collections directory
 COLLECTIONS_BASE = "/Users/jacksonkeet/Pacific Hansard Development/collections/Fiji"
 
+# Static page boilerplate shared by every generated HTML file
+HTML_HEAD_OPEN = '<!DOCTYPE html>\n<html>\n<head>\n    <meta charset="UTF-8">\n    <title>'
+HTML_HEAD_CLOSE = '</title>\n</head>\n<body>\n'
+HTML_CLOSE = '\n</body>\n</html>'
+
+@lru_cache(maxsize=4096)
 def normalize_name(name):
     """Remove all spaces and convert to uppercase for comparison"""
     return ''.join(name.split()).upper()
 
+# Multiple patterns to catch different speaker formats. With IGNORECASE the
+# name class already takes any trailing capitalised words, so a separate
+# repeated word group would only add backtracking on lines with no terminator
+SPEAKER_PATTERNS = [
+    # HON. NAME.- format (with period-dash)
+    re.compile(r'HON\.\s+([A-Z][A-Z.\s\'-]+)\.?-', re.IGNORECASE),
+    # HON. TITLE.- format
+    re.compile(r'HON\.\s+((?:PRIME MINISTER|MINISTER|LEADER|ATTORNEY-GENERAL|SPEAKER|DEPUTY SPEAKER)[A-Z\s\'-]*)\.?-', re.IGNORECASE),
+    # MR/MRS/MS SPEAKER format
+    re.compile(r'(MR\.?|MRS\.?|MS\.?|MADAM)\s+SPEAKER\.?-', re.IGNORECASE),
+    # HON. with colon (old format)
+    re.compile(r'HON\.\s+([A-Z][A-Z.\s\'-]+):', re.IGNORECASE),
+    # MR/MRS/MS/DR SPEAKER
+    re.compile(r'(MR|MRS|MS|DR)\s+SPEAKER:', re.IGNORECASE),
+    # DEPUTY SPEAKER
+    re.compile(r'(DEPUTY SPEAKER):', re.IGNORECASE),
+    # SECRETARY-GENERAL
+    re.compile(r'(SECRETARY-GENERAL):', re.IGNORECASE)
+]
+
 def extract_and_clean_speakers(text):
     """Extract speaker names from text"""
-    speakers = []
-    seen = set()
-    
-    # Multiple patterns to catch different speaker formats
-    patterns = [
-        # HON. NAME.- format (with period-dash)
-        r'HON\.\s+([A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*)\.?-',
-        # HON. TITLE.- format 
-        r'HON\.\s+((?:PRIME MINISTER|MINISTER|LEADER|ATTORNEY-GENERAL|SPEAKER|DEPUTY SPEAKER)[A-Z\s\'-]*)\.?-',
-        # MR/MRS/MS SPEAKER format
-        r'(MR\.?|MRS\.?|MS\.?|MADAM)\s+SPEAKER\.?-',
-        # HON. with colon (old format)
-        r'HON\.\s+([A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*):',
-        # MR/MRS/MS/DR SPEAKER
-        r'(MR|MRS|MS|DR)\s+SPEAKER:',
-        # DEPUTY SPEAKER
-        r'(DEPUTY SPEAKER):',
-        # SECRETARY-GENERAL
-        r'(SECRETARY-GENERAL):'
-    ]
+    # Normalized name -> first display form seen
+    speakers = {}
     
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in SPEAKER_PATTERNS:
+        matches = pattern.findall(text)
         for match in matches:
             if isinstance(match, tuple):
                 name = ' '.join(m for m in match if m).strip()
@@ -68,35 +78,44 @@ def extract_and_clean_speakers(text):
             normalized_name = normalize_name(name)
             
             if (normalized_name and 
-                normalized_name not in seen and 
                 len(normalized_name) > 2 and
                 not normalized_name.isdigit()):
-                seen.add(normalized_name)
-                speakers.append(name)
+                speakers.setdefault(normalized_name, name)
     
     # Sort speakers for consistency
-    speakers.sort()
-    return speakers if speakers else ["No speakers identified"]
+    return sorted(speakers.values()) if speakers else ["No speakers identified"]
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# One line of a questions section: "(1) Title", an Oral/Written header,
+# or a line carrying a "(Q/No. XXX/YYYY)" reference
+QUESTION_LINE_PATTERN = re.compile(
+    r'^[^\S\n]*(?:'
+    r'\((?P<num>\d+)\)[^\S\n]*(?P<title>.+)'
+    r'|(?i:(?P<oral>Oral Questions?))[^\S\n]*'
+    r'|(?i:(?P<written>Written Questions?))[^\S\n]*'
+    r'|.*?\(Q/No\.[^\S\n]*(?P<ref>\d+/\d+)\).*'
+    r')$',
+    re.MULTILINE
+)
 
 def extract_questions_from_content(content):
     """Extract questions from a content section"""
     questions = []
     
     # Remove HTML tags for analysis
-    text = re.sub(r'<[^>]+>', ' ', content)
-    lines = text.split('\n')
+    text = TAG_PATTERN.sub(' ', content)
     
     current_section = None
     current_questions = []
     
-    for line in lines:
-        line = line.strip()
-        
+    for match in QUESTION_LINE_PATTERN.finditer(text):
         # Check for question section headers
-        if re.match(r'^Oral Questions?\s*$', line, re.IGNORECASE):
+        if match.group('oral'):
             current_section = 'oral'
             continue
-        elif re.match(r'^Written Questions?\s*$', line, re.IGNORECASE):
+        elif match.group('written'):
             if current_questions and current_section == 'oral':
                 # Save oral questions
                 questions.extend([(q, 'oral') for q in current_questions])
@@ -107,13 +126,11 @@ def extract_questions_from_content(content):
         # Extract individual questions
         if current_section:
             # Pattern: (1) Question Title
-            match = re.match(r'^\((\d+)\)\s*(.+)', line)
-            if match:
-                q_num = match.group(1)
-                q_title = match.group(2).strip()
+            if match.group('num'):
+                q_num = match.group('num')
                 
                 # Clean up the title
-                q_title = re.sub(r'\s+', ' ', q_title)
+                q_title = WHITESPACE_PATTERN.sub(' ', match.group('title').strip())
                 q_title = q_title.rstrip(' -–—')
                 
                 if len(q_title) > 5:  # Filter out noise
@@ -124,11 +141,9 @@ def extract_questions_from_content(content):
                     })
             
             # Pattern: Q/No. XXX/YYYY
-            elif 'Q/No.' in line:
-                match = re.search(r'\(Q/No\.\s*(\d+/\d+)\)', line)
-                if match and current_questions:
-                    # Assign reference to the last question
-                    current_questions[-1]['reference'] = match.group(1)
+            elif current_questions:
+                # Assign reference to the last question
+                current_questions[-1]['reference'] = match.group('ref')
     
     # Don't forget the last section
     if current_questions and current_section:
@@ -140,13 +155,10 @@ def clean_content(content):
     """Clean HTML content while preserving structure"""
     soup = BeautifulSoup(content, 'html.parser')
     
-    # Remove all style attributes
-    for tag in soup.find_all(style=True):
-        del tag['style']
-    
-    # Remove all class attributes
-    for tag in soup.find_all(class_=True):
-        del tag['class']
+    # Remove all style and class attributes in one traversal
+    for tag in soup.find_all(True):
+        tag.attrs.pop('style', None)
+        tag.attrs.pop('class', None)
     
     # Remove empty paragraphs
     for p in soup.find_all('p'):
@@ -155,19 +167,111 @@ def clean_content(content):
     
     return str(soup)
 
+def iter_content_blocks(input_file):
+    """Stream the content blocks (divs, or paragraphs if there are none) of a hansard in document order"""
+    found = False
+    for tag in ('div', 'p'):
+        pending = []
+        for event, elem in etree.iterparse(input_file, events=('start', 'end'), tag=tag,
+                                           html=True, encoding='utf-8'):
+            if event == 'start':
+                pending.append(elem)
+            elif elem is pending[0]:
+                # The outermost block is complete, so it and the blocks nested
+                # in it can be read, outer first as in the original full parse
+                found = True
+                yield from pending
+                pending = []
+                # Only then detach everything handled before it; parts still
+                # being collected keep their own references
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        if found:
+            break
+
+def serialize_part(part):
+    """Serialize the collected blocks of a part in one pass"""
+    return '\n'.join(etree.tostring(elem, encoding='unicode', method='html', with_tail=False)
+                     for elem in part)
+
+def write_html_page(f, title, *body):
+    """Write a complete HTML page from the static boilerplate and body chunks"""
+    f.write(HTML_HEAD_OPEN)
+    f.write(title)
+    f.write(HTML_HEAD_CLOSE)
+    for chunk in body:
+        f.write(chunk)
+    f.write(HTML_CLOSE)
+
+def emit_part(output_dir, part_number, title, part, date_str, question_counts, contents_parts):
+    """Write a finished part, and any questions it holds, and record it in the contents"""
+    part_content = serialize_part(part)
+    
+    # Check if this is a questions section
+    if 'QUESTION' in title.upper():
+        # Extract questions
+        questions = extract_questions_from_content(part_content)
+        
+        if questions:
+            # Create a questions directory
+            questions_dir = os.path.join(output_dir, f'part{part_number}_questions')
+            os.makedirs(questions_dir, exist_ok=True)
+            
+            for q_data, q_type in questions:
+                q_num = question_counts[q_type] + 1
+                question_counts[q_type] += 1
+                
+                # Create question file
+                q_filename = f"{q_type}_question_{q_num}.html"
+                q_filepath = os.path.join(questions_dir, q_filename)
+                
+                # Extract question content (for now, just the title)
+                q_content = f"""<h4>{q_data['title']}</h4>
+<p><em>Question {q_data['number']}</em></p>"""
+                if q_data['reference']:
+                    q_content += f"<p><em>Reference: Q/No. {q_data['reference']}</em></p>"
+                
+                with open(q_filepath, 'w', encoding='utf-8') as f:
+                    write_html_page(f, f"{q_data['title']} - Fiji Hansard {date_str}",
+                                    f"<h3>{q_type.upper()} QUESTION {q_num}</h3>\n", q_content)
+                
+                # Create metadata
+                metadata_path = q_filepath.replace('.html', '_metadata.txt')
+                with open(metadata_path, 'w', encoding='utf-8') as f:
+                    f.write(f"{q_type.capitalize()} Question {q_num} Speakers:\n")
+                    f.write("Speaker 1: To be extracted from full debate\n\n")
+            
+            contents_parts.append(f"{title} ({len(questions)} questions)")
+    
+    # Regular part
+    part_filename = f"part{part_number}.html"
+    part_filepath = os.path.join(output_dir, part_filename)
+    
+    # Extract speakers
+    speakers = extract_and_clean_speakers(part_content)
+    
+    # Write part file
+    with open(part_filepath, 'w', encoding='utf-8') as f:
+        content_html = clean_content(part_content)
+        write_html_page(f, f"{title} - Fiji Hansard {date_str}",
+                        f"<h3>{title}</h3>\n", content_html)
+    
+    # Write metadata
+    write_speakers_metadata(output_dir, part_number, speakers)
+    
+    if 'QUESTION' not in title.upper():
+        contents_parts.append(title)
+
+# Day, month name and year anywhere in a hansard filename
+FILENAME_DATE_PATTERN = re.compile(r'(\d{1,2})[a-z]{0,2}[-\s]+([A-Za-z]+)[-\s]+(\d{4})')
+
 def process_hansard(input_file):
     """Process a single hansard HTML file"""
     logging.info(f"Processing {input_file}")
     
-    # Read the input file
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    soup = BeautifulSoup(content, 'html.parser')
-    
     # Extract date from filename
     filename = os.path.basename(input_file)
-    date_match = re.search(r'(\d{1,2})[a-z]{0,2}[-\s]+([A-Za-z]+)[-\s]+(\d{4})', filename)
+    date_match = FILENAME_DATE_PATTERN.search(filename)
     
     if date_match:
         day = date_match.group(1)
@@ -200,11 +304,6 @@ def process_hansard(input_file):
     output_dir = os.path.join(COLLECTIONS_BASE, year, month_full, str(int(day)))
     os.makedirs(output_dir, exist_ok=True)
     
-    # Get all divs (content blocks)
-    all_divs = soup.find_all('div')
-    if not all_divs:
-        all_divs = soup.find_all('p')
-    
     # Create contents file
     contents_parts = []
     part_number = 0
@@ -214,139 +313,35 @@ def process_hansard(input_file):
     current_part = []
     current_title = ""
     
-    for div in all_divs:
-        text = div.get_text(strip=True)
+    for div in iter_content_blocks(input_file):
+        text = ''.join(s.strip() for s in div.itertext())
         
         # Check for section headers
         if text and text.isupper() and len(text) > 3 and not all(c in '0123456789.-()' for c in text):
             # Save previous part
             if current_part:
-                part_content = '\n'.join(current_part)
-                
-                # Check if this is a questions section
-                if 'QUESTION' in current_title.upper():
-                    # Extract questions
-                    questions = extract_questions_from_content(part_content)
-                    
-                    if questions:
-                        # Create a questions directory
-                        questions_dir = os.path.join(output_dir, f'part{part_number}_questions')
-                        os.makedirs(questions_dir, exist_ok=True)
-                        
-                        for q_data, q_type in questions:
-                            q_num = question_counts[q_type] + 1
-                            question_counts[q_type] += 1
-                            
-                            # Create question file
-                            q_filename = f"{q_type}_question_{q_num}.html"
-                            q_filepath = os.path.join(questions_dir, q_filename)
-                            
-                            # Extract question content (for now, just the title)
-                            q_content = f"""<h4>{q_data['title']}</h4>
-<p><em>Question {q_data['number']}</em></p>"""
-                            if q_data['reference']:
-                                q_content += f"<p><em>Reference: Q/No. {q_data['reference']}</em></p>"
-                            
-                            with open(q_filepath, 'w', encoding='utf-8') as f:
-                                f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{q_data['title']} - Fiji Hansard {date_str}</title>
-</head>
-<body>
-<h3>{q_type.upper()} QUESTION {q_num}</h3>
-{q_content}
-</body>
-</html>""")
-                            
-                            # Create metadata
-                            metadata_path = q_filepath.replace('.html', '_metadata.txt')
-                            with open(metadata_path, 'w', encoding='utf-8') as f:
-                                f.write(f"{q_type.capitalize()} Question {q_num} Speakers:\n")
-                                f.write("Speaker 1: To be extracted from full debate\n\n")
-                        
-                        contents_parts.append(f"{current_title} ({len(questions)} questions)")
-                
-                # Regular part
-                part_filename = f"part{part_number}.html"
-                part_filepath = os.path.join(output_dir, part_filename)
-                
-                # Extract speakers
-                speakers = extract_and_clean_speakers(part_content)
-                
-                # Write part file
-                with open(part_filepath, 'w', encoding='utf-8') as f:
-                    content_html = clean_content(part_content)
-                    f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{current_title} - Fiji Hansard {date_str}</title>
-</head>
-<body>
-<h3>{current_title}</h3>
-{content_html}
-</body>
-</html>""")
-                
-                # Write metadata
-                write_speakers_metadata(output_dir, part_number, speakers)
-                
-                if 'QUESTION' not in current_title.upper():
-                    contents_parts.append(current_title)
-                
+                emit_part(output_dir, part_number, current_title, current_part,
+                          date_str, question_counts, contents_parts)
                 part_number += 1
             
             # Start new part
             current_title = text
-            current_part = [str(div)]
+            current_part = [div]
         else:
-            current_part.append(str(div))
+            current_part.append(div)
     
     # Don't forget the last part
     if current_part:
-        part_content = '\n'.join(current_part)
-        part_filename = f"part{part_number}.html"
-        part_filepath = os.path.join(output_dir, part_filename)
-        
-        speakers = extract_and_clean_speakers(part_content)
-        
-        with open(part_filepath, 'w', encoding='utf-8') as f:
-            content_html = clean_content(part_content)
-            f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{current_title} - Fiji Hansard {date_str}</title>
-</head>
-<body>
-<h3>{current_title}</h3>
-{content_html}
-</body>
-</html>""")
-        
-        write_speakers_metadata(output_dir, part_number, speakers)
-        contents_parts.append(current_title)
+        emit_part(output_dir, part_number, current_title, current_part,
+                  date_str, question_counts, contents_parts)
     
     # Create contents.html
     contents_path = os.path.join(output_dir, 'contents.html')
     with open(contents_path, 'w', encoding='utf-8') as f:
-        f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Contents - Fiji Hansard {date_str}</title>
-</head>
-<body>
-<h2>Contents</h2>
-<ul>
-""")
-        for part in contents_parts:
-            f.write(f"<li>{part}</li>\n")
-        f.write("""</ul>
-</body>
-</html>""")
+        write_html_page(f, f"Contents - Fiji Hansard {date_str}",
+                        "<h2>Contents</h2>\n<ul>\n",
+                        ''.join(f"<li>{part}</li>\n" for part in contents_parts),
+                        "</ul>")
     
     logging.info(f"Successfully processed {input_file}")
     logging.info(f"Output directory: {output_dir}")
@@ -376,11 +371,14 @@ def process_all_fiji_hansards():
     
     processed_count = 0
     
-    for filename in os.listdir(html_dir):
-        if filename.endswith('.html') and 'hansard' in filename.lower():
-            filepath = os.path.join(html_dir, filename)
-            if process_hansard(filepath):
-                processed_count += 1
+    with os.scandir(html_dir) as entries:
+        html_files = [entry.path for entry in entries
+                      if entry.is_file() and entry.name.endswith('.html')
+                      and 'hansard' in entry.name.lower()]
+    
+    for filepath in html_files:
+        if process_hansard(filepath):
+            processed_count += 1
     
     logging.info(f"Processed {processed_count} Fiji hansards")
     return processed_count
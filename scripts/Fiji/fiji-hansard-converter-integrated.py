@@ -6,12 +6,15 @@ Converts Fiji Parliament hansards and outputs directly to collections structure
 
 import re
 import os
+from bisect import bisect_right
 try:
-    from bs4 import BeautifulSoup
+    from bs4 import BeautifulSoup, SoupStrainer
 except ImportError:
-    from BeautifulSoup import BeautifulSoup
+    from BeautifulSoup import BeautifulSoup, SoupStrainer
+from lxml import etree
 from datetime import datetime
 import logging
+from functools import lru_cache
 
 # Setup logging
 logging.basicConfig(
@@ -22,57 +25,82 @@ logging.basicConfig(
 # Base collections directory
 COLLECTIONS_BASE = "/Users/jacksonkeet/Pacific Hansard Development/collections/Fiji"
 
+# Static page boilerplate shared by every generated HTML file
+HTML_HEAD_OPEN = '<!DOCTYPE html>\n<html>\n<head>\n    <meta charset="UTF-8">\n    <title>'
+HTML_HEAD_CLOSE = '</title>\n</head>\n<body>\n'
+HTML_CLOSE = '\n</body>\n</html>'
+
+@lru_cache(maxsize=4096)
 def normalize_name(name):
     """Remove all spaces and convert to uppercase for comparison"""
     return ''.join(name.split()).upper()
 
-def extract_and_clean_speakers(text):
-    """Extract speaker names from text"""
-    speakers = []
-    seen = set()
-    
-    # Multiple patterns to catch different speaker formats
-    patterns = [
-        # HON. with optional titles
-        r'HON\.\s+((?:PROFESSOR|DR\.|MR\.|MRS\.|MS\.)?\s*[A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*):',
-        # MR/MRS/MS/DR SPEAKER
-        r'(MR|MRS|MS|DR)\s+SPEAKER:',
-        # Just titles with names
-        r'(MR|MRS|MS|DR)\.?\s+([A-Z]\.?\s*[A-Z][A-Z.\s\'-]+):',
-        # DEPUTY SPEAKER
-        r'(DEPUTY SPEAKER):',
-        # SECRETARY-GENERAL
-        r'(SECRETARY-GENERAL):'
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
-            if isinstance(match, tuple):
-                name = ' '.join(match).strip()
+# Multiple patterns to catch different speaker formats. With IGNORECASE the
+# name class already takes any trailing capitalised words, so a separate
+# repeated word group would only add backtracking on lines with no terminator
+SPEAKER_PATTERNS = [
+    # HON. with optional titles
+    re.compile(r'HON\.\s+((?:PROFESSOR|DR\.|MR\.|MRS\.|MS\.)?\s*[A-Z][A-Z.\s\'-]+):', re.IGNORECASE),
+    # MR/MRS/MS/DR SPEAKER
+    re.compile(r'(MR|MRS|MS|DR)\s+SPEAKER:', re.IGNORECASE),
+    # Just titles with names
+    re.compile(r'(MR|MRS|MS|DR)\.?\s+([A-Z]\.?\s*[A-Z][A-Z.\s\'-]+):', re.IGNORECASE),
+    # DEPUTY SPEAKER
+    re.compile(r'(DEPUTY SPEAKER):', re.IGNORECASE),
+    # SECRETARY-GENERAL
+    re.compile(r'(SECRETARY-GENERAL):', re.IGNORECASE)
+]
+
+# Joins texts for a batched scan; none of the speaker patterns can match it,
+# so no match ever spans two texts
+SPEAKER_TEXT_SEPARATOR = '\x00'
+
+def extract_speakers_batch(texts):
+    """Extract speaker names from several texts with one scan per pattern"""
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + len(SPEAKER_TEXT_SEPARATOR)
+    joined = SPEAKER_TEXT_SEPARATOR.join(texts)
+    
+    speakers = [[] for _ in texts]
+    seen = [set() for _ in texts]
+    
+    for pattern in SPEAKER_PATTERNS:
+        for match in pattern.finditer(joined):
+            groups = match.groups('')
+            if len(groups) > 1:
+                name = ' '.join(groups).strip()
             else:
-                name = match.strip()
+                name = groups[0].strip()
             
             name = name.rstrip('.').rstrip(':')
             normalized_name = normalize_name(name)
             
-            if normalized_name and normalized_name not in seen:
-                seen.add(normalized_name)
-                speakers.append(name)
+            # Attribute the match to the text it was found in
+            index = bisect_right(starts, match.start()) - 1
+            if normalized_name and normalized_name not in seen[index]:
+                seen[index].add(normalized_name)
+                speakers[index].append(name)
     
-    return speakers if speakers else ["No speakers identified"]
+    return [found if found else ["No speakers identified"] for found in speakers]
+
+def extract_and_clean_speakers(text):
+    """Extract speaker names from text"""
+    return extract_speakers_batch([text])[0]
+
+# Pattern: Daily-Hansard-{Day}-{Date}-{Month}-{Year}
+FILENAME_DATE_PATTERNS = [
+    re.compile(r'(\w+)-(\d+)\w*-(\w+)-(\d{4})'),  # Standard pattern
+    re.compile(r'DH-\w+-(\d+)\w*-(\w+)-(\d{4})'),  # DH- pattern
+    re.compile(r'(\d+)\w*-(\w+)-(\d{4})')  # Just date pattern
+]
 
 def extract_date_from_filename(filename):
     """Extract date from Fiji hansard filename"""
-    # Pattern: Daily-Hansard-{Day}-{Date}-{Month}-{Year}
-    patterns = [
-        r'(\w+)-(\d+)\w*-(\w+)-(\d{4})',  # Standard pattern
-        r'DH-\w+-(\d+)\w*-(\w+)-(\d{4})',  # DH- pattern
-        r'(\d+)\w*-(\w+)-(\d{4})'  # Just date pattern
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, filename)
+    for pattern in FILENAME_DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
             groups = match.groups()
             if len(groups) == 4:
@@ -97,21 +125,15 @@ def clean_content(content):
     """Clean HTML content"""
     soup = BeautifulSoup(content, 'html.parser')
     
-    # Remove all style attributes
-    for tag in soup.find_all(style=True):
-        del tag['style']
-    
-    # Remove all class attributes
-    for tag in soup.find_all(class_=True):
-        del tag['class']
-    
-    # Convert div tags to p tags
-    for div in soup.find_all('div'):
-        div.name = 'p'
-    
-    # Preserve line breaks
-    for br in soup.find_all("br"):
-        br.replace_with("\n")
+    # One traversal drops style and class attributes, converts div tags to
+    # p tags and preserves line breaks
+    for tag in soup.find_all(True):
+        tag.attrs.pop('style', None)
+        tag.attrs.pop('class', None)
+        if tag.name == 'div':
+            tag.name = 'p'
+        elif tag.name == 'br':
+            tag.replace_with("\n")
     
     # Remove empty paragraphs
     for p in soup.find_all('p'):
@@ -120,24 +142,26 @@ def clean_content(content):
     
     return str(soup)
 
+QUESTION_PATTERNS = [
+    re.compile(r'Question\s+No\.\s*\d+', re.IGNORECASE),
+    re.compile(r'Oral\s+Questions?', re.IGNORECASE),
+    re.compile(r'Written\s+Questions?', re.IGNORECASE),
+    re.compile(r'QUESTIONS\s+AND\s+ANSWERS', re.IGNORECASE),
+    re.compile(r'\(Question\s+No\.\s*\d+\)', re.IGNORECASE)
+]
+
 def detect_questions(text):
     """Detect if content contains questions"""
-    question_patterns = [
-        r'Question\s+No\.\s*\d+',
-        r'Oral\s+Questions?',
-        r'Written\s+Questions?',
-        r'QUESTIONS\s+AND\s+ANSWERS',
-        r'\(Question\s+No\.\s*\d+\)'
-    ]
-    
-    for pattern in question_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
+    for pattern in QUESTION_PATTERNS:
+        if pattern.search(text):
             return True
     return False
 
+QUESTION_START_PATTERN = re.compile(r'Question\s+No\.\s*\d+', re.IGNORECASE)
+
 def split_questions(content):
     """Split content into individual questions"""
-    soup = BeautifulSoup(content, 'html.parser')
+    soup = BeautifulSoup(content, 'html.parser', parse_only=SoupStrainer(['h3', 'p']))
     questions = []
     current_question = []
     question_num = 0
@@ -146,8 +170,8 @@ def split_questions(content):
         text = element.get_text()
         
         # Check if this starts a new question
-        if re.search(r'Question\s+No\.\s*\d+', text, re.IGNORECASE) or \
-           re.search(r'\(Question\s+No\.\s*\d+\)', text, re.IGNORECASE):
+        # ("(Question No. N)" is covered by the same pattern)
+        if QUESTION_START_PATTERN.search(text):
             if current_question:
                 questions.append({
                     'number': question_num,
@@ -169,6 +193,90 @@ def split_questions(content):
     
     return questions
 
+def iter_divs(input_file):
+    """Stream the divs of a hansard in document order without building the whole document tree"""
+    pending = []
+    for event, div in etree.iterparse(input_file, events=('start', 'end'), tag='div',
+                                      html=True, encoding='utf-8'):
+        if event == 'start':
+            pending.append(div)
+        elif div is pending[0]:
+            # The outermost div is complete, so it and the divs nested in it
+            # can be read, outer first as in the original full parse
+            yield from pending
+            pending = []
+            # Only then detach everything handled before it; parts still
+            # being collected keep their own references
+            while div.getprevious() is not None:
+                del div.getparent()[0]
+
+def serialize_part(part):
+    """Serialize the collected divs of a part in one pass"""
+    return '\n'.join(etree.tostring(div, encoding='unicode', method='html', with_tail=False)
+                     for div in part)
+
+def write_html_page(f, title, *body):
+    """Write a complete HTML page from the static boilerplate and body chunks"""
+    f.write(HTML_HEAD_OPEN)
+    f.write(title)
+    f.write(HTML_HEAD_CLOSE)
+    for chunk in body:
+        f.write(chunk)
+    f.write(HTML_CLOSE)
+
+def emit_part(output_dir, part_number, title, part, in_questions, date_str, contents_parts):
+    """Write a finished part (or its questions) and record it in the contents"""
+    part_content = serialize_part(part)
+    
+    if in_questions:
+        # Process questions
+        questions = split_questions(part_content)
+        # Extract speakers for all of the part's questions in one pass
+        question_speakers = extract_speakers_batch([q['content'] for q in questions])
+        for i, q in enumerate(questions):
+            q_filename = f"{q['type']}_question_{i+1}.html"
+            q_filepath = os.path.join(output_dir, q_filename)
+            speakers = question_speakers[i]
+            
+            # Write question file
+            with open(q_filepath, 'w', encoding='utf-8') as f:
+                q_type = q['type'].capitalize()
+                write_html_page(f, f"Fiji Hansard {q_type} Question {i+1} - {date_str}",
+                                clean_content(q['content']))
+            
+            # Write metadata
+            metadata_path = q_filepath.replace('.html', '_metadata.txt')
+            with open(metadata_path, 'w', encoding='utf-8') as f:
+                q_type = q['type'].capitalize()
+                f.write(f"{q_type} Question {i+1} Speakers:\n")
+                for j, speaker in enumerate(speakers):
+                    f.write(f"Speaker {j+1}: {speaker}\n")
+            
+            q_type = q['type'].capitalize()
+            contents_parts.append(f"{q_type} Question {i+1}")
+    else:
+        # Regular part
+        part_filename = f"part{part_number}.html"
+        part_filepath = os.path.join(output_dir, part_filename)
+        
+        # Extract speakers
+        speakers = extract_and_clean_speakers(part_content)
+        
+        # Write part file
+        with open(part_filepath, 'w', encoding='utf-8') as f:
+            content = clean_content(part_content)
+            write_html_page(f, f"{title} - Fiji Hansard {date_str}",
+                            f"<h3>{title}</h3>\n", content)
+        
+        # Write metadata
+        metadata_path = part_filepath.replace('.html', '_metadata.txt')
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            f.write(f"Part {part_number} Speakers:\n")
+            for j, speaker in enumerate(speakers):
+                f.write(f"Speaker {j+1}: {speaker}\n")
+        
+        contents_parts.append(title)
+
 def process_hansard(input_file, output_base_dir=None):
     """Process a single hansard file"""
     logging.info(f"Processing {input_file}")
@@ -190,13 +298,7 @@ def process_hansard(input_file, output_base_dir=None):
         output_dir = os.path.join(COLLECTIONS_BASE, year, month, day)
     
     os.makedirs(output_dir, exist_ok=True)
-    
-    # Read the input file
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    soup = BeautifulSoup(content, 'html.parser')
-    all_divs = soup.find_all('div')
+    date_str = date_obj.strftime('%Y-%m-%d')
     
     # Create contents file
     contents_parts = []
@@ -207,171 +309,37 @@ def process_hansard(input_file, output_base_dir=None):
     current_title = ""
     in_questions = False
     
-    for div in all_divs:
-        text = div.get_text(strip=True)
-        
+    for div in iter_divs(input_file):
         # Check for section headers (usually in uppercase)
-        span = div.find('span', {'style': lambda value: value and 'Bold' in value})
+        span = next(iter(div.xpath(".//span[contains(@style, 'Bold')]")), None)
+        span_text = ''.join(span.itertext()).strip() if span is not None else ''
         
-        if span and span.text.strip().isupper() and len(span.text.strip()) > 3:
+        if span_text.isupper() and len(span_text) > 3:
             # Save previous part
             if current_part:
-                if in_questions:
-                    # Process questions
-                    questions = split_questions('\n'.join(current_part))
-                    for i, q in enumerate(questions):
-                        q_filename = f"{q['type']}_question_{i+1}.html"
-                        q_filepath = os.path.join(output_dir, q_filename)
-                        
-                        # Extract speakers from question
-                        speakers = extract_and_clean_speakers(q['content'])
-                        
-                        # Write question file
-                        with open(q_filepath, 'w', encoding='utf-8') as f:
-                            date_str = date_obj.strftime('%Y-%m-%d')
-                            q_type = q['type'].capitalize()
-                            f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Fiji Hansard {q_type} Question {i+1} - {date_str}</title>
-</head>
-<body>
-{clean_content(q['content'])}
-</body>
-</html>""")
-                        
-                        # Write metadata
-                        metadata_path = q_filepath.replace('.html', '_metadata.txt')
-                        with open(metadata_path, 'w', encoding='utf-8') as f:
-                            q_type = q['type'].capitalize()
-                            f.write(f"{q_type} Question {i+1} Speakers:\n")
-                            for j, speaker in enumerate(speakers):
-                                f.write(f"Speaker {j+1}: {speaker}\n")
-                        
-                        q_type = q['type'].capitalize()
-                        contents_parts.append(f"{q_type} Question {i+1}")
-                else:
-                    # Regular part
-                    part_filename = f"part{part_number}.html"
-                    part_filepath = os.path.join(output_dir, part_filename)
-                    
-                    # Extract speakers
-                    speakers = extract_and_clean_speakers('\n'.join(current_part))
-                    
-                    # Write part file
-                    with open(part_filepath, 'w', encoding='utf-8') as f:
-                        date_str = date_obj.strftime('%Y-%m-%d')
-                        content = clean_content('\n'.join(current_part))
-                        html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{current_title} - Fiji Hansard {date_str}</title>
-</head>
-<body>
-<h3>{current_title}</h3>
-{content}
-</body>
-</html>"""
-                        f.write(html_content)
-                    
-                    # Write metadata
-                    metadata_path = part_filepath.replace('.html', '_metadata.txt')
-                    with open(metadata_path, 'w', encoding='utf-8') as f:
-                        f.write(f"Part {part_number} Speakers:\n")
-                        for j, speaker in enumerate(speakers):
-                            f.write(f"Speaker {j+1}: {speaker}\n")
-                    
-                    contents_parts.append(current_title)
+                emit_part(output_dir, part_number, current_title, current_part,
+                          in_questions, date_str, contents_parts)
             
             # Start new part
             part_number += 1
-            current_title = span.text.strip()
-            current_part = [str(div)]
+            current_title = span_text
+            current_part = [div]
             in_questions = 'QUESTION' in current_title.upper()
         else:
-            current_part.append(str(div))
+            current_part.append(div)
     
     # Don't forget the last part
     if current_part:
-        if in_questions:
-            questions = split_questions('\n'.join(current_part))
-            for i, q in enumerate(questions):
-                q_filename = f"{q['type']}_question_{i+1}.html"
-                q_filepath = os.path.join(output_dir, q_filename)
-                
-                speakers = extract_and_clean_speakers(q['content'])
-                
-                with open(q_filepath, 'w', encoding='utf-8') as f:
-                    date_str = date_obj.strftime('%Y-%m-%d')
-                    q_type = q['type'].capitalize()
-                    f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Fiji Hansard {q_type} Question {i+1} - {date_str}</title>
-</head>
-<body>
-{clean_content(q['content'])}
-</body>
-</html>""")
-                
-                metadata_path = q_filepath.replace('.html', '_metadata.txt')
-                with open(metadata_path, 'w', encoding='utf-8') as f:
-                    f.write(f"{q['type'].capitalize()} Question {i+1} Speakers:\n")
-                    for j, speaker in enumerate(speakers):
-                        f.write(f"Speaker {j+1}: {speaker}\n")
-                
-                contents_parts.append(f"{q['type'].capitalize()} Question {i+1}")
-        else:
-            part_filename = f"part{part_number}.html"
-            part_filepath = os.path.join(output_dir, part_filename)
-            
-            speakers = extract_and_clean_speakers('\n'.join(current_part))
-            
-            with open(part_filepath, 'w', encoding='utf-8') as f:
-                date_str = date_obj.strftime('%Y-%m-%d')
-                content = clean_content('\n'.join(current_part))
-                f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>{current_title} - Fiji Hansard {date_str}</title>
-</head>
-<body>
-<h3>{current_title}</h3>
-{content}
-</body>
-</html>""")
-            
-            metadata_path = part_filepath.replace('.html', '_metadata.txt')
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                f.write(f"Part {part_number} Speakers:\n")
-                for j, speaker in enumerate(speakers):
-                    f.write(f"Speaker {j+1}: {speaker}\n")
-            
-            contents_parts.append(current_title)
+        emit_part(output_dir, part_number, current_title, current_part,
+                  in_questions, date_str, contents_parts)
     
     # Write contents file
     contents_path = os.path.join(output_dir, 'contents.html')
     with open(contents_path, 'w', encoding='utf-8') as f:
-        date_str = date_obj.strftime('%Y-%m-%d')
-        f.write(f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Contents - Fiji Hansard {date_str}</title>
-</head>
-<body>
-<h2>Contents</h2>
-<ul>
-""")
-        for part in contents_parts:
-            f.write(f"<li>{part}</li>\n")
-        f.write("""</ul>
-</body>
-</html>""")
+        write_html_page(f, f"Contents - Fiji Hansard {date_str}",
+                        "<h2>Contents</h2>\n<ul>\n",
+                        ''.join(f"<li>{part}</li>\n" for part in contents_parts),
+                        "</ul>")
     
     logging.info(f"Successfully processed {input_file}")
     logging.info(f"Output directory: {output_dir}")
@@ -387,11 +355,14 @@ def process_all_fiji_hansards():
     
     processed_count = 0
     
-    for filename in os.listdir(html_dir):
-        if filename.endswith('.html') and 'hansard' in filename.lower():
-            filepath = os.path.join(html_dir, filename)
-            if process_hansard(filepath):
-                processed_count += 1
+    with os.scandir(html_dir) as entries:
+        html_files = [entry.path for entry in entries
+                      if entry.is_file() and entry.name.endswith('.html')
+                      and 'hansard' in entry.name.lower()]
+    
+    for filepath in html_files:
+        if process_hansard(filepath):
+            processed_count += 1
     
     logging.info(f"Processed {processed_count} Fiji hansards")
     return processed_count
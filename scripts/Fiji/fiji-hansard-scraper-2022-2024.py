@@ -9,11 +9,16 @@ from bs4 import BeautifulSoup
 import os
 import re
 import json
-from datetime import datetime
-import time
+from datetime import datetime, timedelta
 import logging
-import subprocess
-from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from html import unescape
+from urllib.parse import urljoin, unquote
+from fiji_common import (TARGET_YEARS, TARGET_YEAR_PATTERN, NOT_MODIFIED, HTTP_CACHE_ENABLED, make_session,
+                         iter_processed_records, load_processed_hansards, append_processed,
+                         save_processed_hansards, pdf_filename, download_pdf, response_validators,
+                         conditional_headers, validators_unchanged)
 
 # Setup logging
 logging.basicConfig(
@@ -43,76 +48,138 @@ SEARCH_URLS = [
     "/wp-content/uploads/"  # WordPress common upload path
 ]
 
-# Years to search for
-TARGET_YEARS = ['2022', '2023', '2024']
+# Any of 'hansard', 'daily-hansard' or 'dh-' in a link's href or text
+HANSARD_LINK_PATTERN = re.compile(r'hansard|daily-hansard|dh-', re.IGNORECASE)
 
-def load_processed_hansards():
-    """Load the list of already processed hansards"""
+# PDF hrefs in a server directory listing, which is simple enough to scan
+# without building a soup
+LISTING_PDF_HREF_PATTERN = re.compile(r'href=["\']([^"\']+\.pdf)["\']', re.IGNORECASE)
+
+# One pooled keep-alive session shared by every request
+MAX_WORKERS = 8
+PAGE_TIMEOUT = (5, 30)
+DOWNLOAD_TIMEOUT = (5, 300)
+SESSION = make_session({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate'
+})
+
+# Processed hansards are rechecked against the server at most this often,
+# so a run only looks at the records whose last check has aged out
+RECHECK_INTERVAL = timedelta(days=30)
+
+# HEAD results for speculative discovery URLs, so each is checked only once
+URL_CHECKS = {}
+
+# ETag/Last-Modified of the pages scanned for links, so pages unchanged since
+# the last run come back 304 with no body (requests-cache does this itself)
+PAGE_VALIDATORS_FILE = 'data/fiji_page_validators.json'
+PAGE_VALIDATORS = {}
+
+def load_page_validators():
+    """Load the validators recorded for each scanned page"""
     try:
-        with open('data/fiji_processed_hansards.json', 'r') as f:
+        with open(PAGE_VALIDATORS_FILE, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
         return {}
 
-def save_processed_hansards(processed):
-    """Save the list of processed hansards"""
-    with open('data/fiji_processed_hansards.json', 'w') as f:
-        json.dump(processed, f, indent=2)
+def save_page_validators():
+    """Save the validators recorded for each scanned page"""
+    with open(PAGE_VALIDATORS_FILE, 'w') as f:
+        json.dump(PAGE_VALIDATORS, f, indent=2)
 
-def download_with_curl(url, output_path):
-    """Download file using curl"""
+def looks_like_pdf(url):
+    """HEAD-check that a URL serves a non-trivial PDF before downloading it"""
     try:
-        cmd = [
-            'curl', '-L', '-o', output_path,
-            '-H', 'User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            '-H', 'Accept: application/pdf,text/html,*/*',
-            '--compressed',
-            '--connect-timeout', '30',
-            '--max-time', '300',
-            url
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 1000:
-            return True
-        else:
-            if os.path.exists(output_path):
-                os.remove(output_path)
-            return False
-            
-    except Exception as e:
-        logging.error(f"Error downloading {url}: {str(e)}")
+        response = SESSION.head(url, allow_redirects=True, timeout=PAGE_TIMEOUT)
+    except requests.RequestException:
+        # Let the GET report the error
+        return True
+    
+    # Some servers do not support HEAD; fall back to the full download
+    if response.status_code in (405, 501):
+        return True
+    if not response.ok:
         return False
+    
+    content_type = response.headers.get('Content-Type', '').lower()
+    if content_type and 'pdf' not in content_type and 'octet-stream' not in content_type:
+        return False
+    
+    content_length = response.headers.get('Content-Length', '')
+    if content_length.isdigit() and int(content_length) <= 1000:
+        return False
+    
+    return True
 
-def fetch_page_with_curl(url):
-    """Fetch page content using curl"""
+def download_file(url, output_path):
+    """Download a PDF over the shared session, returning its sha256 and size"""
+    if not looks_like_pdf(url):
+        logging.warning(f"Skipping {url}: not a PDF")
+        return None
+    
+    return download_pdf(SESSION, url, output_path, DOWNLOAD_TIMEOUT)
+
+def fetch_page(url, conditional=False):
+    """Fetch page content over the shared session, or None if a conditional fetch is unchanged"""
+    headers = {'Accept': 'text/html,application/xhtml+xml',
+               **conditional_headers(PAGE_VALIDATORS.get(url, {}) if conditional else {})}
+    
     try:
-        cmd = [
-            'curl', '-L',
-            '-H', 'User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            '-H', 'Accept: text/html,application/xhtml+xml',
-            '--compressed',
-            '--connect-timeout', '30',
-            url
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            return result.stdout
-        else:
-            logging.error(f"Curl failed for {url}: {result.stderr}")
+        response = SESSION.get(url, headers=headers, timeout=PAGE_TIMEOUT)
+        if response.status_code == 304:
+            logging.info(f"Unchanged since last run: {url}")
             return None
+        response.raise_for_status()
+        
+        if conditional:
+            validators = response_validators(response.headers)
+            if validators:
+                PAGE_VALIDATORS[url] = validators
+            else:
+                PAGE_VALIDATORS.pop(url, None)
+        return response.text
             
     except Exception as e:
         logging.error(f"Error fetching {url}: {str(e)}")
         return None
 
+def fetch_pages(urls):
+    """Fetch several pages to scan for links concurrently, returning their contents in order"""
+    for url in urls:
+        logging.info(f"Checking: {url}")
+    # With requests-cache the cached session revalidates on its own
+    conditional = not HTTP_CACHE_ENABLED
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        return list(executor.map(lambda url: fetch_page(url, conditional), urls))
+
+def url_exists(url):
+    """Check a speculative URL with a cheap HEAD before fetching its body"""
+    if url not in URL_CHECKS:
+        try:
+            response = SESSION.head(url, allow_redirects=True, timeout=10)
+            if response.status_code in (405, 501):
+                # Servers that refuse HEAD get a GET for just the first 2KB
+                with SESSION.get(url, headers={'Range': 'bytes=0-2047'}, stream=True,
+                                 timeout=10) as response:
+                    pass
+            content_type = response.headers.get('Content-Type', 'text/html')
+            URL_CHECKS[url] = (response.status_code in (200, 206) and 'html' in content_type)
+        except Exception as e:
+            logging.error(f"Error checking {url}: {str(e)}")
+            URL_CHECKS[url] = False
+    return URL_CHECKS[url]
+
+def fetch_existing_pages(urls):
+    """Fetch only the URLs that answer a HEAD check, returning (url, content) pairs"""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        exists = list(executor.map(url_exists, urls))
+    live_urls = [url for url, found in zip(urls, exists) if found]
+    return list(zip(live_urls, fetch_pages(live_urls)))
+
 def search_year_specific_pages(base_url, year):
-    """Search for year-specific pages"""
-    year_urls = []
-    
+    """Search for year-specific pages, returning (url, content) pairs"""
     # Common year-based URL patterns
     year_patterns = [
         f"/{year}/",
@@ -123,22 +190,21 @@ def search_year_specific_pages(base_url, year):
         f"/wp-content/uploads/{year}/"
     ]
     
-    for pattern in year_patterns:
-        test_url = urljoin(base_url, pattern)
-        logging.info(f"Checking year URL: {test_url}")
-        
-        content = fetch_page_with_curl(test_url)
-        if content and 'hansard' in content.lower():
-            year_urls.append(test_url)
-    
-    return year_urls
+    test_urls = [urljoin(base_url, pattern) for pattern in year_patterns]
+    return [(url, content) for url, content in fetch_existing_pages(test_urls)
+            if content and 'hansard' in content.lower()]
 
-def extract_hansard_links(content, base_url, year_filter=None):
-    """Extract hansard links from page content"""
+@lru_cache(maxsize=4096)
+def abs_url(base_url, href):
+    """Resolve a link against the page it was found on"""
+    return urljoin(base_url, href)
+
+def extract_hansard_links(content, base_url, year_filter=None, seen=None):
+    """Extract hansard links from page content, skipping files already in seen"""
     if not content:
         return []
     
-    soup = BeautifulSoup(content, 'html.parser')
+    soup = BeautifulSoup(content, 'lxml')
     hansard_links = []
     
     # Find all links
@@ -146,10 +212,10 @@ def extract_hansard_links(content, base_url, year_filter=None):
     
     for link in all_links:
         href = link.get('href', '')
-        text = link.get_text(strip=True).lower()
+        text = link.get_text(strip=True)
         
         # Check if it's a hansard link
-        if any(keyword in href.lower() or keyword in text for keyword in ['hansard', 'daily-hansard', 'dh-']):
+        if HANSARD_LINK_PATTERN.search(href) or HANSARD_LINK_PATTERN.search(text):
             # Check for PDF files
             if href.lower().endswith('.pdf'):
                 # Apply year filter if specified
@@ -157,132 +223,263 @@ def extract_hansard_links(content, base_url, year_filter=None):
                     if year_filter not in href and year_filter not in text:
                         continue
                 
-                absolute_url = urljoin(base_url, href)
+                absolute_url = abs_url(base_url, href)
+                if seen is not None:
+                    filename = pdf_filename(absolute_url)
+                    if filename in seen:
+                        continue
+                    seen.add(filename)
                 hansard_links.append({
                     'url': absolute_url,
-                    'text': link.get_text(strip=True),
+                    'text': text,
                     'type': 'pdf'
                 })
     
     return hansard_links
 
-def search_wordpress_uploads(base_url, years):
+def extract_listing_links(content, listing_url, year_filter=None, seen=None):
+    """Extract hansard links from a directory listing, skipping files already in seen"""
+    hansard_links = []
+    
+    for match in LISTING_PDF_HREF_PATTERN.finditer(content):
+        href = unescape(match.group(1))
+        # Listings show the file name as the link text
+        text = unquote(os.path.basename(href))
+        
+        if not (HANSARD_LINK_PATTERN.search(href) or HANSARD_LINK_PATTERN.search(text)):
+            continue
+        if year_filter and year_filter not in href and year_filter not in text:
+            continue
+        
+        absolute_url = abs_url(listing_url, href)
+        if seen is not None:
+            filename = pdf_filename(absolute_url)
+            if filename in seen:
+                continue
+            seen.add(filename)
+        hansard_links.append({
+            'url': absolute_url,
+            'text': text,
+            'type': 'pdf'
+        })
+    
+    return hansard_links
+
+def list_subdirectories(url):
+    """Return the subdirectory links of a server directory listing"""
+    content = fetch_page(url)
+    if not content:
+        return []
+    
+    soup = BeautifulSoup(content, 'lxml')
+    subdirectories = []
+    for link in soup.find_all('a', href=True):
+        target = urljoin(url, link['href'])
+        # Only follow links deeper into this directory (skips parent and sort links)
+        if target.startswith(url) and target != url and target.endswith('/') and target not in subdirectories:
+            subdirectories.append(target)
+    return subdirectories
+
+def search_wordpress_uploads(base_url, years, seen=None):
     """Search WordPress uploads directory structure"""
     hansard_links = []
+    uploads_url = urljoin(base_url, "/wp-content/uploads/")
+    
+    # When the server lists directories, walk only the months that exist
+    listed = list_subdirectories(uploads_url)
+    year_dirs = {year: urljoin(uploads_url, f"{year}/") for year in years}
+    year_dirs = {year: url for year, url in year_dirs.items() if url in listed}
     
     for year in years:
-        # WordPress typically organizes uploads by year/month
-        for month in range(1, 13):
-            month_str = f"{month:02d}"
-            upload_url = urljoin(base_url, f"/wp-content/uploads/{year}/{month_str}/")
-            
-            logging.info(f"Checking WordPress uploads: {upload_url}")
-            content = fetch_page_with_curl(upload_url)
-            
-            if content:
-                links = extract_hansard_links(content, base_url, year)
-                hansard_links.extend(links)
+        if year_dirs:
+            if year not in year_dirs:
+                continue
+            month_urls = list_subdirectories(year_dirs[year])
+            for month_url, content in zip(month_urls, fetch_pages(month_urls)):
+                if content:
+                    # Month listings are scanned directly rather than parsed
+                    hansard_links.extend(extract_listing_links(content, month_url, year, seen))
+        else:
+            # No listing: WordPress typically organizes uploads by year/month
+            upload_urls = [urljoin(base_url, f"/wp-content/uploads/{year}/{month:02d}/")
+                           for month in range(1, 13)]
+            for upload_url, content in fetch_existing_pages(upload_urls):
+                if content:
+                    # Listings use relative hrefs, so resolve them against the page itself
+                    links = extract_hansard_links(content, upload_url, year, seen)
+                    hansard_links.extend(links)
     
     return hansard_links
 
+def recheck_processed_hansards(known_hashes):
+    """Re-fetch processed hansards changed on the server, returning the files replaced"""
+    # Latest record per file, for files downloaded with an ETag or Last-Modified
+    checks = {}
+    for filename, record in iter_processed_records():
+        if 'duplicate_of' not in record and ('etag' in record or 'last_modified' in record):
+            checks[filename] = record
+        else:
+            checks.pop(filename, None)
+    
+    # Only records not checked within the interval are due
+    due_before = (datetime.now() - RECHECK_INTERVAL).isoformat()
+    checks = {filename: record for filename, record in checks.items()
+              if record.get('checked_date', record.get('download_date', '')) < due_before}
+    
+    logging.info(f"Rechecking {len(checks)} processed hansards for server-side updates")
+    
+    # A HEAD decides whether a file changed, so servers that ignore conditional
+    # GETs never send the body of an unchanged file; changed ones download
+    # aside so a failed fetch never costs the copy we have
+    def recheck_one(item):
+        filename, record = item
+        if validators_unchanged(SESSION, record['url'], record, PAGE_TIMEOUT):
+            return NOT_MODIFIED
+        part_path = os.path.join('pdf_hansards', f"{filename}.part")
+        return download_pdf(SESSION, record['url'], part_path, DOWNLOAD_TIMEOUT, record)
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(recheck_one, checks.items()))
+    
+    updated = []
+    recorded = False
+    checked_date = datetime.now().isoformat()
+    for (filename, record), downloaded in zip(checks.items(), results):
+        if downloaded is None:
+            continue
+        
+        if downloaded != NOT_MODIFIED:
+            os.replace(os.path.join('pdf_hansards', f"{filename}.part"),
+                       os.path.join('pdf_hansards', filename))
+            if downloaded['sha256'] != record.get('sha256'):
+                logging.info(f"Updated on the server: {filename}")
+                if known_hashes.get(record.get('sha256')) == filename:
+                    del known_hashes[record['sha256']]
+                known_hashes[downloaded['sha256']] = filename
+                updated.append(filename)
+                
+                # Drop the HTML converted from the old copy so it is converted again
+                stale_html = os.path.join('html_hansards', filename.replace('.pdf', '.html'))
+                if os.path.exists(stale_html):
+                    os.remove(stale_html)
+            
+            # Store the new validators even if only they changed, so the next
+            # recheck sees them unchanged
+            record = {key: value for key, value in record.items() if key not in ('etag', 'last_modified')}
+            record.update(downloaded, download_date=checked_date)
+        
+        # Stamp every answered check, so the record is not due again until
+        # the interval has passed
+        append_processed(filename, {**record, 'checked_date': checked_date})
+        recorded = True
+    
+    return updated, recorded
+
 def scrape_fiji_parliament_years():
     """Scrape Fiji Parliament for hansards from 2022-2024"""
     logging.info("Starting enhanced Fiji Parliament scraper for 2022-2024...")
     
-    processed = load_processed_hansards()
+    # Only names and content hashes are kept; full records stay on disk
+    processed, known_hashes = load_processed_hansards()
+    PAGE_VALIDATORS.update(load_page_validators())
+    updated_hansards, recorded = recheck_processed_hansards(known_hashes)
     all_hansard_links = []
+    # Files already processed or found this run are skipped at discovery,
+    # so a re-run only carries new hansards forward
+    seen_files = set(processed)
     new_hansards = []
     
     # Try each base URL
     for base_url in BASE_URLS:
         logging.info(f"\nTrying base URL: {base_url}")
         
-        # Try each search path
-        for search_path in SEARCH_URLS:
-            url = urljoin(base_url, search_path)
-            logging.info(f"Checking: {url}")
-            
-            content = fetch_page_with_curl(url)
+        # Try each search path that answers a HEAD probe
+        search_urls = [urljoin(base_url, search_path) for search_path in SEARCH_URLS]
+        for search_url, content in fetch_existing_pages(search_urls):
             if content:
                 # Extract hansard links
                 for year in TARGET_YEARS:
-                    links = extract_hansard_links(content, base_url, year)
+                    links = extract_hansard_links(content, base_url, year, seen_files)
                     all_hansard_links.extend(links)
         
         # Try year-specific pages
         for year in TARGET_YEARS:
-            year_urls = search_year_specific_pages(base_url, year)
-            for year_url in year_urls:
-                content = fetch_page_with_curl(year_url)
-                if content:
-                    links = extract_hansard_links(content, base_url, year)
-                    all_hansard_links.extend(links)
+            for year_url, content in search_year_specific_pages(base_url, year):
+                links = extract_hansard_links(content, base_url, year, seen_files)
+                all_hansard_links.extend(links)
         
         # Try WordPress uploads structure
-        wp_links = search_wordpress_uploads(base_url, TARGET_YEARS)
+        wp_links = search_wordpress_uploads(base_url, TARGET_YEARS, seen_files)
         all_hansard_links.extend(wp_links)
     
-    # Remove duplicates
-    unique_links = {}
-    for link in all_hansard_links:
-        url = link['url']
-        if url not in unique_links:
-            unique_links[url] = link
+    logging.info(f"\nFound {len(all_hansard_links)} new hansard links "
+                 f"({len(processed)} already processed)")
     
-    logging.info(f"\nFound {len(unique_links)} unique hansard links")
-    
-    # Download new hansards
-    for url, link_info in unique_links.items():
-        filename = os.path.basename(urlparse(url).path)
+    # Pick out the new hansards from the target years
+    to_download = []
+    for link_info in all_hansard_links:
+        url = link_info['url']
+        filename = pdf_filename(url)
         
         # Skip if no filename
         if not filename:
             continue
         
-        # Skip if already processed
-        if filename in processed:
-            logging.info(f"Already processed: {filename}")
-            continue
-        
         # Check if it's from target years
-        year_found = False
-        for year in TARGET_YEARS:
-            if year in filename or year in link_info['text']:
-                year_found = True
-                break
-        
-        if not year_found:
-            # Try to extract date from filename
-            date_match = re.search(r'(\d{4})', filename)
-            if date_match and date_match.group(1) in TARGET_YEARS:
-                year_found = True
-        
-        if not year_found:
+        if not (TARGET_YEAR_PATTERN.search(filename) or TARGET_YEAR_PATTERN.search(link_info['text'])):
             logging.info(f"Skipping {filename} - not from target years")
             continue
         
         logging.info(f"Found new hansard: {filename}")
-        
-        # Download
-        pdf_path = os.path.join('pdf_hansards', filename)
+        to_download.append((url, link_info, filename))
+    
+    # Download concurrently; the worker cap keeps us polite to the server
+    def download_one(item):
+        url, _, filename = item
         logging.info(f"Downloading {url}")
-        
-        if download_with_curl(url, pdf_path):
+        return download_file(url, os.path.join('pdf_hansards', filename))
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(download_one, to_download))
+    
+    failed = False
+    
+    for (url, link_info, filename), downloaded in zip(to_download, results):
+        if downloaded:
             logging.info(f"Successfully downloaded {filename}")
             
-            processed[filename] = {
+            record = {
                 'url': url,
                 'download_date': datetime.now().isoformat(),
-                'text': link_info['text']
+                'text': link_info['text'],
+                **downloaded
             }
             
-            new_hansards.append(filename)
-            save_processed_hansards(processed)
+            duplicate_of = known_hashes.get(downloaded['sha256'])
+            if duplicate_of:
+                # Same content under another name: record it but keep one copy
+                logging.info(f"{filename} has the same content as {duplicate_of}")
+                os.remove(os.path.join('pdf_hansards', filename))
+                record['duplicate_of'] = duplicate_of
+            else:
+                known_hashes[downloaded['sha256']] = filename
+                new_hansards.append(filename)
             
-            # Be polite
-            time.sleep(2)
+            processed.add(filename)
+            append_processed(filename, record)
+            recorded = True
         else:
             logging.error(f"Failed to download {filename}")
+            failed = True
+    
+    # Fold the journal back into the shared snapshot
+    if recorded:
+        save_processed_hansards()
+    
+    # After a failed download, keep the old validators so the pages that
+    # linked to it are scanned again next run
+    if not failed:
+        save_page_validators()
     
     # If no hansards found, try alternative search
     if len(new_hansards) == 0:
@@ -296,8 +493,13 @@ def scrape_fiji_parliament_years():
         logging.info("New files:")
         for file in sorted(new_hansards):
             logging.info(f"  - {file}")
+    if updated_hansards:
+        logging.info(f"Hansards updated on the server: {len(updated_hansards)}")
+        for file in sorted(updated_hansards):
+            logging.info(f"  - {file}")
     
-    return new_hansards
+    # Updated hansards need converting again just like new ones
+    return new_hansards + updated_hansards
 
 def google_search_fiji_hansards():
     """Use Google to find Fiji hansards"""
@@ -4,22 +4,33 @@ Fiji Parliament Hansard Scraper - Dynamic Tab Handler
 Handles the dynamic year tabs on https://www.parliament.gov.fj/hansard/
 """
 
-import requests
 from bs4 import BeautifulSoup
 import os
 import re
-import json
+import hashlib
 from datetime import datetime
 import time
+import random
 import logging
-import subprocess
+import threading
+import asyncio
+import importlib.util
+import requests
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from urllib.parse import urljoin, urlparse
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from lxml import etree
+from fiji_common import (TARGET_YEARS, TARGET_YEAR_PATTERN, PDF_ACCEPT, RETRY_STATUSES, MAX_RETRIES,
+                         make_session, backoff_delay, load_processed_hansards, append_processed,
+                         save_processed_hansards, pdf_filename, pdf_fingerprint, download_pdf,
+                         response_validators)
+
+# The browser and async download backends are heavy, so only check here that
+# they are installed; each is imported by the code path that uses it
+HAS_AIOHTTP = importlib.util.find_spec('aiohttp') is not None
+HAS_PLAYWRIGHT = importlib.util.find_spec('playwright') is not None
+HAS_SELENIUM = importlib.util.find_spec('selenium') is not None
 
 # Setup logging
 logging.basicConfig(
@@ -37,59 +48,307 @@ os.makedirs('data', exist_ok=True)
 BASE_URL = "https://www.parliament.gov.fj"
 HANSARD_PAGE = "https://www.parliament.gov.fj/hansard/"
 
-# Years to search for
-TARGET_YEARS = ['2022', '2023', '2024']
+# Link filters used when scanning the static page
+PDF_HREF_PATTERN = re.compile(r'\.pdf$', re.I)
+
+# How long Playwright waits for a year tab's PDF links to appear (ms)
+TAB_LOAD_TIMEOUT = 10000
+# How long Selenium waits for the page and each year tab to load (s)
+SELENIUM_WAIT = 15
+# Year tabs, scoped to the tab list so footers and dates never match
+YEAR_TAB = "[role=tab]:has-text('{year}'), .nav-tabs a:has-text('{year}'), .nav-tabs button:has-text('{year}')"
+# PDF links inside the panel a clicked year tab controls
+TAB_PANEL_PDFS = '[id="{panel}"] a[href$=".pdf"]'
+
+# Chrome flags that trim startup and background work; only the PDF anchors
+# matter, so images are not loaded either
+CHROME_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--window-size=1920,1080',
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-sync',
+    '--disable-default-apps',
+    '--log-level=3'
+]
+CHROME_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.stylesheets': 2
+}
+# Resources Playwright aborts instead of fetching
+BLOCKED_RESOURCE_TYPES = {'image', 'stylesheet', 'font', 'media'}
 
-def load_processed_hansards():
-    """Load the list of already processed hansards"""
+# Concurrent downloads overall, and at most this many against any one host
+DOWNLOAD_WORKERS = 8
+DOWNLOADS_PER_HOST = 4
+# Downloads started per second on average when falling back to threads
+DOWNLOAD_RATE = 2
+# Random pause (s) before each aiohttp download while holding a host slot
+DOWNLOAD_JITTER = (0.2, 0.8)
+# Seconds an idle aiohttp connection is kept open for reuse
+KEEPALIVE_TIMEOUT = 30
+DOWNLOAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': PDF_ACCEPT
+}
+
+# One keep-alive session for every synchronous page fetch and download
+PAGE_TIMEOUT = (10, 60)
+DOWNLOAD_TIMEOUT = (10, 300)
+PAGE_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+}
+
+SESSION = make_session({
+    'User-Agent': DOWNLOAD_HEADERS['User-Agent'],
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Referer': HANSARD_PAGE
+}, pool_connections=1)
+
+def fetch_page(url):
+    """Fetch page content over the shared session"""
     try:
-        with open('data/fiji_processed_hansards.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+        response = SESSION.get(url, headers=PAGE_HEADERS, timeout=PAGE_TIMEOUT)
+        response.raise_for_status()
+        return response.text
+    except Exception as e:
+        logging.error(f"Error fetching {url}: {str(e)}")
+        return None
 
-def save_processed_hansards(processed):
-    """Save the list of processed hansards"""
-    with open('data/fiji_processed_hansards.json', 'w') as f:
-        json.dump(processed, f, indent=2)
+def stream_anchors(url):
+    """Yield (href, text) for each anchor as the page streams in"""
+    try:
+        with SESSION.get(url, headers=PAGE_HEADERS, timeout=PAGE_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # Parse straight off the socket, dropping each anchor once read
+            for _, elem in etree.iterparse(response.raw, events=('end',), tag='a', html=True):
+                href = elem.get('href')
+                if href:
+                    yield href, ''.join(part.strip() for part in elem.itertext())
+                elem.clear()
+                # Anchors sit inside list items, paragraphs and cells, so detach
+                # everything already read at every level, not just beside the anchor;
+                # the root has no parent, and whatever precedes it stays
+                for node in (elem, *elem.iterancestors()):
+                    if node.getparent() is None:
+                        break
+                    while node.getprevious() is not None:
+                        del node.getparent()[0]
+    except (requests.RequestException, urllib3.exceptions.HTTPError, etree.LxmlError) as e:
+        # Only network and parse failures end the page early, and the log says so
+        logging.error(f"Error fetching {url}, links on it may be missing: {str(e)}")
 
-def download_with_curl(url, output_path):
-    """Download file using curl"""
+async def download_with_aiohttp(session, url, output_path, host_limits):
+    """Download a PDF over a shared aiohttp session, returning its sha256 and size"""
+    host = urlparse(url).netloc
+    semaphore = host_limits.setdefault(host, asyncio.Semaphore(DOWNLOADS_PER_HOST))
     try:
-        cmd = [
-            'curl', '-L', '-o', output_path,
-            '-H', 'User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            '-H', 'Accept: application/pdf,text/html,*/*',
-            '--compressed',
-            '--connect-timeout', '30',
-            '--max-time', '300',
-            url
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        digest = hashlib.sha256()
+        size = 0
+        magic = b''
+        async with semaphore:
+            # Jittered pause keeps the per-host pace polite without lockstep bursts
+            await asyncio.sleep(random.uniform(*DOWNLOAD_JITTER))
+            for attempt in range(MAX_RETRIES + 1):
+                async with session.get(url) as response:
+                    # Back off on throttling and transient errors rather than failing
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        delay = backoff_delay(attempt, response.headers.get('Retry-After'))
+                        logging.warning(f"{url} returned {response.status}, retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
+                    response.raise_for_status()
+                    validators = response_validators(response.headers)
+                    with open(output_path, 'wb') as f:
+                        async for chunk in response.content.iter_chunked(1 << 16):
+                            if len(magic) < 4:
+                                magic += chunk[:4 - len(magic)]
+                            digest.update(chunk)
+                            size += len(chunk)
+                            f.write(chunk)
+                    break
         
-        if result.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 1000:
-            return True
-        else:
-            if os.path.exists(output_path):
-                os.remove(output_path)
-            return False
+        return pdf_fingerprint(digest, size, magic, output_path, validators)
             
     except Exception as e:
         logging.error(f"Error downloading {url}: {str(e)}")
-        return False
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return None
+
+async def download_all(to_download):
+    """Drain a queue of (url, filename) pairs with a pool of download workers"""
+    queue = asyncio.Queue()
+    for item in to_download:
+        queue.put_nowait(item)
+    
+    results = {}
+    host_limits = {}
+    import aiohttp
+    timeout = aiohttp.ClientTimeout(total=300, connect=30)
+    # Reuse connections and TLS sessions across every download
+    connector = aiohttp.TCPConnector(limit=DOWNLOAD_WORKERS, keepalive_timeout=KEEPALIVE_TIMEOUT)
+    
+    async with aiohttp.ClientSession(headers=DOWNLOAD_HEADERS, timeout=timeout,
+                                     connector=connector) as session:
+        async def worker():
+            while not queue.empty():
+                url, filename = queue.get_nowait()
+                logging.info(f"Downloading: {filename}")
+                pdf_path = os.path.join('pdf_hansards', filename)
+                results[filename] = await download_with_aiohttp(session, url, pdf_path, host_limits)
+        
+        await asyncio.gather(*(worker() for _ in range(DOWNLOAD_WORKERS)))
+    
+    return results
+
+def rate_limiter(rate):
+    """Return a wait function that lets callers on any thread start about rate times per second"""
+    interval = 1.0 / rate
+    lock = threading.Lock()
+    next_start = [0.0]
+    
+    def wait():
+        with lock:
+            now = time.monotonic()
+            start = max(now, next_start[0])
+            # Vary each gap around the interval so starts do not tick like a clock
+            next_start[0] = start + interval * random.uniform(0.5, 1.5)
+        time.sleep(start - now)
+    
+    return wait
+
+def download_threaded(to_download):
+    """Download (url, filename) pairs on a thread pool sharing the session"""
+    wait_for_slot = rate_limiter(DOWNLOAD_RATE)
+    
+    def fetch(item):
+        url, filename = item
+        # Be polite: one global pace instead of a pause after every file
+        wait_for_slot()
+        logging.info(f"Downloading: {filename}")
+        return download_pdf(SESSION, url, os.path.join('pdf_hansards', filename), DOWNLOAD_TIMEOUT)
+    
+    with ThreadPoolExecutor(max_workers=DOWNLOADS_PER_HOST) as executor:
+        downloaded = list(executor.map(fetch, to_download))
+    return {filename: result for (_, filename), result in zip(to_download, downloaded)}
+
+@lru_cache(maxsize=4096)
+def abs_url(href):
+    """Resolve a link against the site root"""
+    return urljoin(BASE_URL, href)
+
+def add_hansard_link(links, seen, url, text, year):
+    """Record a hansard link unless its file is already processed or found"""
+    filename = pdf_filename(url)
+    if filename in seen:
+        return
+    seen.add(filename)
+    links.append({
+        'url': url,
+        'text': text,
+        'year': year
+    })
+    logging.info(f"Found: {text} - {url}")
 
-def scrape_with_selenium():
+def tab_panel_id(tab_elements):
+    """Return the id of the panel a year tab controls, from its aria-controls or #href"""
+    for elem in tab_elements:
+        controls = elem.get_attribute('aria-controls')
+        if controls:
+            return controls
+        href = elem.get_attribute('href') or ''
+        if '#' in href and href.split('#', 1)[1]:
+            return href.split('#', 1)[1]
+    return None
+
+def scrape_with_playwright(processed):
+    """Use Playwright to handle dynamic JavaScript content in one browser session"""
+    logging.info("Starting Playwright-based scraper for dynamic content...")
+    
+    all_hansard_links = []
+    # Processed files are skipped as soon as their links are seen
+    seen = set(processed)
+    
+    try:
+        from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch(headless=True, args=CHROME_ARGS)
+            page = browser.new_page()
+            page.route('**/*', lambda route: route.abort()
+                       if route.request.resource_type in BLOCKED_RESOURCE_TYPES
+                       else route.continue_())
+            
+            logging.info(f"Navigating to {HANSARD_PAGE}")
+            page.goto(HANSARD_PAGE, wait_until='domcontentloaded')
+            
+            for year in TARGET_YEARS:
+                logging.info(f"\nSearching for {year} hansards...")
+                
+                # Click the year tab if there is one, then wait for its PDF links
+                # rather than sleeping for a fixed time
+                tab = page.locator(YEAR_TAB.format(year=year)).first
+                if tab.count():
+                    try:
+                        tab.click()
+                        logging.info(f"Clicked on {year} tab")
+                    except Exception as e:
+                        logging.warning(f"Error clicking year element: {str(e)}")
+                else:
+                    logging.warning(f"No tab/button found for year {year}")
+                
+                try:
+                    page.wait_for_selector(f'a[href*=".pdf"][href*="{year}"]', timeout=TAB_LOAD_TIMEOUT)
+                except PlaywrightTimeoutError:
+                    logging.warning(f"No {year} PDF links appeared")
+                
+                pdf_links = page.eval_on_selector_all(
+                    'a[href*=".pdf"]', 'links => links.map(link => [link.href, link.innerText])')
+                
+                for href, text in pdf_links:
+                    # Check if it's a hansard and from the target year
+                    if 'hansard' in href.lower() or 'hansard' in text.lower():
+                        if year in href or year in text:
+                            absolute_url = abs_url(href)
+                            add_hansard_link(all_hansard_links, seen, absolute_url, text, year)
+            
+            # Save page source for debugging
+            with open('logs/hansard_page_playwright.html', 'w', encoding='utf-8') as f:
+                f.write(page.content())
+            
+            browser.close()
+        return all_hansard_links
+        
+    except Exception as e:
+        logging.error(f"Playwright error: {str(e)}")
+        logging.info("Falling back to Selenium...")
+        return []
+
+def scrape_with_selenium(processed):
     """Use Selenium to handle dynamic JavaScript content"""
+    if not HAS_SELENIUM:
+        logging.info("Selenium is not installed, skipping browser scrape")
+        return []
+    
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.chrome.options import Options
+    from selenium.common.exceptions import TimeoutException
+    
     logging.info("Starting Selenium-based scraper for dynamic content...")
     
     # Setup Chrome options
     chrome_options = Options()
-    chrome_options.add_argument('--headless')  # Run in headless mode
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument('--headless=new')  # Run in headless mode
+    for arg in CHROME_ARGS:
+        chrome_options.add_argument(arg)
+    chrome_options.add_experimental_option('prefs', CHROME_PREFS)
     
     try:
         # Initialize the Chrome driver
@@ -100,33 +359,48 @@ def scrape_with_selenium():
         logging.info(f"Navigating to {HANSARD_PAGE}")
         driver.get(HANSARD_PAGE)
         
-        # Wait for page to load
-        time.sleep(5)
+        # Wait for the first PDF links rather than a fixed pause
+        wait = WebDriverWait(driver, SELENIUM_WAIT)
+        try:
+            wait.until(EC.presence_of_element_located((By.XPATH, "//a[contains(@href, '.pdf')]")))
+        except TimeoutException:
+            logging.warning("No PDF links appeared on the hansard page")
         
         # Find all hansard links for each year
         all_hansard_links = []
+        # Processed files are skipped as soon as their links are seen
+        seen = set(processed)
         
         for year in TARGET_YEARS:
             logging.info(f"\nSearching for {year} hansards...")
             
             try:
-                # Look for year tabs or buttons
-                year_elements = driver.find_elements(By.XPATH, f"//a[contains(text(), '{year}')] | //button[contains(text(), '{year}')] | //li[contains(text(), '{year}')]")
+                # Look for year tabs or buttons in a single traversal
+                year_elements = driver.find_elements(
+                    By.XPATH, f"//*[self::a or self::button or self::li][contains(text(), '{year}')]")
                 
                 if year_elements:
                     # Click on the year tab/button
                     for year_elem in year_elements:
                         try:
                             driver.execute_script("arguments[0].scrollIntoView(true);", year_elem)
-                            time.sleep(1)
                             driver.execute_script("arguments[0].click();", year_elem)
                             logging.info(f"Clicked on {year} tab")
                             
-                            # Wait for content to load
-                            time.sleep(3)
-                            
-                            # Find PDF links
-                            pdf_links = driver.find_elements(By.XPATH, "//a[contains(@href, '.pdf')]")
+                            # Wait for the PDF links of the panel this tab controls, not
+                            # whichever panel happens to be showing
+                            pdf_links = []
+                            panel = tab_panel_id((year_elem, *year_elem.find_elements(By.TAG_NAME, 'a')))
+                            if panel:
+                                panel_pdfs = TAB_PANEL_PDFS.format(panel=panel)
+                                try:
+                                    wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, panel_pdfs)))
+                                    pdf_links = driver.find_elements(By.CSS_SELECTOR, panel_pdfs)
+                                except TimeoutException:
+                                    logging.warning(f"No {year} tab panel appeared, matching PDF links by year")
+                            if not pdf_links:
+                                pdf_links = driver.find_elements(
+                                    By.XPATH, f"//a[contains(@href, '.pdf') and contains(@href, '{year}')]")
                             
                             for link in pdf_links:
                                 href = link.get_attribute('href')
@@ -135,13 +409,8 @@ def scrape_with_selenium():
                                 # Check if it's a hansard and from the target year
                                 if href and ('hansard' in href.lower() or 'hansard' in text.lower()):
                                     if year in href or year in text:
-                                        absolute_url = urljoin(BASE_URL, href)
-                                        all_hansard_links.append({
-                                            'url': absolute_url,
-                                            'text': text,
-                                            'year': year
-                                        })
-                                        logging.info(f"Found: {text} - {absolute_url}")
+                                        absolute_url = abs_url(href)
+                                        add_hansard_link(all_hansard_links, seen, absolute_url, text, year)
                             
                             break  # Found and processed the year tab
                             
@@ -160,13 +429,8 @@ def scrape_with_selenium():
                         text = link.text
                         
                         if href and ('hansard' in href.lower() or 'hansard' in text.lower()):
-                            absolute_url = urljoin(BASE_URL, href)
-                            all_hansard_links.append({
-                                'url': absolute_url,
-                                'text': text,
-                                'year': year
-                            })
-                            logging.info(f"Found: {text} - {absolute_url}")
+                            absolute_url = abs_url(href)
+                            add_hansard_link(all_hansard_links, seen, absolute_url, text, year)
                             
             except Exception as e:
                 logging.error(f"Error processing year {year}: {str(e)}")
@@ -181,150 +445,151 @@ def scrape_with_selenium():
         
     except Exception as e:
         logging.error(f"Selenium error: {str(e)}")
-        logging.info("Falling back to curl-based approach...")
+        logging.info("Falling back to static page fetch...")
         return []
 
-def scrape_with_curl_fallback():
-    """Fallback method using curl to fetch the page"""
-    logging.info("Using curl fallback method...")
-    
-    cmd = [
-        'curl', '-L',
-        '-H', 'User-Agent: Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        '-H', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        '-H', 'Accept-Language: en-US,en;q=0.5',
-        '-H', 'Connection: keep-alive',
-        '--compressed',
-        HANSARD_PAGE
-    ]
+def scrape_static_fallback(processed):
+    """Fallback method fetching the page without a browser"""
+    logging.info("Using static fetch fallback method...")
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    content = fetch_page(HANSARD_PAGE)
     
-    if result.returncode == 0:
-        content = result.stdout
-        
+    if content is not None:
         # Save for debugging
-        with open('logs/hansard_page_curl.html', 'w', encoding='utf-8') as f:
+        with open('logs/hansard_page_static.html', 'w', encoding='utf-8') as f:
             f.write(content)
         
-        soup = BeautifulSoup(content, 'html.parser')
+        soup = BeautifulSoup(content, 'lxml')
         all_hansard_links = []
+        # Processed files are skipped as soon as their links are seen
+        seen = set(processed)
+        # Each year-specific page is fetched once, under the earliest year it
+        # names, however many anchors point at it
+        year_pages = {year: [] for year in TARGET_YEARS}
+        queued_pages = set()
         
-        # Look for all PDF links
-        pdf_links = soup.find_all('a', href=re.compile(r'\.pdf$', re.I))
-        
-        for link in pdf_links:
-            href = link.get('href', '')
+        # One pass over the anchors sorts out PDF links and year-specific pages
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            
+            if not PDF_HREF_PATTERN.search(href):
+                if 'hansard' in href.lower():
+                    years = TARGET_YEAR_PATTERN.findall(href)
+                    year_url = abs_url(href)
+                    if years and year_url not in queued_pages:
+                        queued_pages.add(year_url)
+                        year_pages[min(years)].append(year_url)
+                continue
+            
             text = link.get_text(strip=True)
             
             # Check if it's a hansard
             if 'hansard' in href.lower() or 'hansard' in text.lower():
                 # Check for target years
-                for year in TARGET_YEARS:
-                    if year in href or year in text:
-                        absolute_url = urljoin(BASE_URL, href)
-                        all_hansard_links.append({
-                            'url': absolute_url,
-                            'text': text,
-                            'year': year
-                        })
-                        logging.info(f"Found: {text} - {absolute_url}")
-                        break
+                year_match = TARGET_YEAR_PATTERN.search(href) or TARGET_YEAR_PATTERN.search(text)
+                if year_match:
+                    absolute_url = abs_url(href)
+                    add_hansard_link(all_hansard_links, seen, absolute_url, text, year_match.group(0))
         
         # Also check for year-specific pages
         for year in TARGET_YEARS:
-            year_links = soup.find_all('a', href=re.compile(f'{year}', re.I))
-            for link in year_links:
-                href = link.get('href', '')
-                if 'hansard' in href.lower():
-                    # This might be a year-specific page, fetch it
-                    year_url = urljoin(BASE_URL, href)
-                    logging.info(f"Checking year-specific page: {year_url}")
-                    
-                    year_cmd = cmd[:-1] + [year_url]
-                    year_result = subprocess.run(year_cmd, capture_output=True, text=True)
+            for year_url in year_pages[year]:
+                # This might be a year-specific page, fetch it
+                logging.info(f"Checking year-specific page: {year_url}")
+                
+                for pdf_href, pdf_text in stream_anchors(year_url):
+                    if not PDF_HREF_PATTERN.search(pdf_href):
+                        continue
                     
-                    if year_result.returncode == 0:
-                        year_soup = BeautifulSoup(year_result.stdout, 'html.parser')
-                        year_pdfs = year_soup.find_all('a', href=re.compile(r'\.pdf$', re.I))
-                        
-                        for pdf_link in year_pdfs:
-                            pdf_href = pdf_link.get('href', '')
-                            pdf_text = pdf_link.get_text(strip=True)
-                            
-                            if 'hansard' in pdf_href.lower() or 'hansard' in pdf_text.lower():
-                                absolute_url = urljoin(BASE_URL, pdf_href)
-                                all_hansard_links.append({
-                                    'url': absolute_url,
-                                    'text': pdf_text,
-                                    'year': year
-                                })
-                                logging.info(f"Found: {pdf_text} - {absolute_url}")
+                    if 'hansard' in pdf_href.lower() or 'hansard' in pdf_text.lower():
+                        absolute_url = abs_url(pdf_href)
+                        add_hansard_link(all_hansard_links, seen, absolute_url, pdf_text, year)
         
         return all_hansard_links
     
     else:
-        logging.error(f"Curl failed: {result.stderr}")
         return []
 
 def main():
     """Main function to orchestrate the scraping"""
     logging.info("Starting Fiji Parliament Hansard Scraper for 2022-2024...")
     
-    processed = load_processed_hansards()
+    # Only names and content hashes are kept; full records stay on disk
+    processed, known_hashes = load_processed_hansards()
     new_hansards = []
     
-    # Try Selenium first, then fall back to curl
-    all_hansard_links = scrape_with_selenium()
+    # Drive a browser first, preferring Playwright's persistent CDP connection
+    # over Selenium, then fall back to a static fetch
+    all_hansard_links = []
+    if HAS_PLAYWRIGHT:
+        all_hansard_links = scrape_with_playwright(processed)
+    
+    if not all_hansard_links:
+        all_hansard_links = scrape_with_selenium(processed)
     
     if not all_hansard_links:
-        all_hansard_links = scrape_with_curl_fallback()
+        all_hansard_links = scrape_static_fallback(processed)
     
-    # Remove duplicates
-    unique_links = {}
-    for link in all_hansard_links:
-        url = link['url']
-        if url not in unique_links:
-            unique_links[url] = link
+    # The scrapers drop duplicate and already processed files as they find them
+    unique_links = {link['url']: link for link in all_hansard_links}
     
-    logging.info(f"\nFound {len(unique_links)} unique hansard links")
+    logging.info(f"\nFound {len(unique_links)} new hansard links "
+                 f"({len(processed)} already processed)")
     
-    # Download new hansards
+    # Pick out the hansards we have not downloaded yet
+    to_download = []
     for url, link_info in unique_links.items():
-        filename = os.path.basename(urlparse(url).path)
+        filename = pdf_filename(url)
         
         # Skip if no filename
         if not filename or not filename.endswith('.pdf'):
             continue
         
-        # Skip if already processed
-        if filename in processed:
-            logging.info(f"Already processed: {filename}")
-            continue
-        
-        logging.info(f"Downloading: {filename}")
-        
-        # Download
-        pdf_path = os.path.join('pdf_hansards', filename)
-        
-        if download_with_curl(url, pdf_path):
+        to_download.append((url, filename))
+    
+    # Download concurrently, with aiohttp when available and threads otherwise;
+    # the per-host and rate limits replace the fixed pause between downloads
+    if HAS_AIOHTTP:
+        results = asyncio.run(download_all(to_download))
+    else:
+        results = download_threaded(to_download)
+    
+    recorded = False
+    
+    for url, filename in to_download:
+        downloaded = results.get(filename)
+        if downloaded:
             logging.info(f"Successfully downloaded {filename}")
             
-            processed[filename] = {
+            link_info = unique_links[url]
+            record = {
                 'url': url,
                 'download_date': datetime.now().isoformat(),
                 'text': link_info.get('text', ''),
-                'year': link_info.get('year', '')
+                'year': link_info.get('year', ''),
+                **downloaded
             }
+            recorded = True
             
-            new_hansards.append(filename)
-            save_processed_hansards(processed)
+            duplicate_of = known_hashes.get(downloaded['sha256'])
+            if duplicate_of:
+                # Same content under another name: record it but keep one copy
+                logging.info(f"{filename} has the same content as {duplicate_of}")
+                os.remove(os.path.join('pdf_hansards', filename))
+                record['duplicate_of'] = duplicate_of
+            else:
+                known_hashes[downloaded['sha256']] = filename
+                new_hansards.append(filename)
             
-            # Be polite
-            time.sleep(2)
+            processed.add(filename)
+            append_processed(filename, record)
         else:
             logging.error(f"Failed to download {filename}")
     
+    # Fold the journal back into the shared snapshot
+    if recorded:
+        save_processed_hansards()
+    
     # Summary
     logging.info(f"\nScraping complete!")
     logging.info(f"New hansards downloaded: {len(new_hansards)}")
@@ -334,7 +599,8 @@ def main():
             logging.info(f"  - {file}")
     else:
         logging.info("\nNo new hansards found. The dynamic tabs might require JavaScript.")
-        logging.info("Check logs/hansard_page_selenium.html or logs/hansard_page_curl.html for debugging")
+        logging.info("Check logs/hansard_page_playwright.html, logs/hansard_page_selenium.html "
+                     "or logs/hansard_page_static.html for debugging")
         logging.info("\nManual URLs to check:")
         for year in TARGET_YEARS:
             logging.info(f"  - {HANSARD_PAGE}?year={year}")
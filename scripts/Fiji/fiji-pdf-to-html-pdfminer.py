@@ -7,9 +7,9 @@ Same method as Cook Islands hansards which produces good results
 import os
 import logging
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from pdfminer.high_level import extract_text_to_fp
 from pdfminer.layout import LAParams
-from io import StringIO
 
 # Setup logging
 logging.basicConfig(
@@ -17,21 +17,29 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Hansards are single-column text, so skip pdfminer's text box reordering,
+# the most expensive layout pass, and keep vertical text detection off
+LAYOUT_PARAMS = LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+
 def pdf_to_html(pdf_path, html_path):
     """Convert PDF to HTML using pdfminer - same as Cook Islands method"""
     try:
-        output_string = StringIO()
-        with open(pdf_path, 'rb') as fin:
-            extract_text_to_fp(fin, output_string, laparams=LAParams(), output_type='html', codec=None)
-        
-        with open(html_path, 'w', encoding='utf-8') as fout:
-            fout.write(output_string.getvalue())
+        # Stream the HTML straight to disk rather than building it in memory
+        with open(pdf_path, 'rb') as fin, open(html_path, 'wb') as fout:
+            extract_text_to_fp(fin, fout, laparams=LAYOUT_PARAMS, output_type='html', codec='utf-8')
         
         return True
     except Exception as e:
         logging.error(f"Error converting {pdf_path}: {str(e)}")
+        # Drop any partial output so it is not mistaken for a finished conversion
+        if os.path.exists(html_path):
+            os.remove(html_path)
         return False
 
+def pdf_to_html_worker(task):
+    """Process pool entry point taking a (pdf_path, html_path) pair"""
+    return pdf_to_html(*task)
+
 def convert_all_pdfs():
     """Convert all PDFs in pdf_hansards to HTML in html_hansards"""
     pdf_dir = 'pdf_hansards'
@@ -49,20 +57,39 @@ def convert_all_pdfs():
     
     logging.info(f"Found {len(pdf_files)} PDF files to convert")
     
+    tasks = []
+    pending_files = []
     for filename in pdf_files:
         pdf_path = os.path.join(pdf_dir, filename)
-        html_filename = filename.replace('.pdf', '.html')
-        html_path = os.path.join(html_dir, html_filename)
+        html_path = os.path.join(html_dir, filename.replace('.pdf', '.html'))
         
-        logging.info(f"Converting: {filename}")
+        # Skip if the HTML is already newer than its PDF
+        if os.path.exists(html_path) and os.path.getmtime(html_path) >= os.path.getmtime(pdf_path):
+            logging.info(f"  Already converted: {filename}")
+            continue
         
-        if pdf_to_html(pdf_path, html_path):
+        tasks.append((pdf_path, html_path))
+        pending_files.append(filename)
+    
+    if not tasks:
+        logging.info("All PDFs are already converted")
+        return 0
+    
+    # Parsing is CPU-bound and every PDF is independent, so spread them
+    # across the available cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = list(executor.map(pdf_to_html_worker, tasks, chunksize=4))
+    
+    # Report from the main process so the output is not interleaved
+    for filename, converted in zip(pending_files, results):
+        if converted:
             logging.info(f"  ✓ Successfully converted {filename}")
             converted_count += 1
         else:
             logging.error(f"  ✗ Failed to convert {filename}")
     
-    logging.info(f"\nConversion complete: {converted_count}/{len(pdf_files)} PDFs converted")
+    logging.info(f"\nConversion complete: {converted_count}/{len(tasks)} PDFs converted "
+                 f"({len(pdf_files) - len(tasks)} already up to date)")
     return converted_count
 
 if __name__ == "__main__":
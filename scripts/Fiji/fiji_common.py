@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Shared pieces of the Fiji hansard scrapers
+Session setup, the processed-hansards record and PDF downloading
+"""
+
+import requests
+import os
+import re
+import json
+import hashlib
+import random
+import logging
+from functools import lru_cache
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    from requests_cache import CachedSession, DO_NOT_CACHE
+except ImportError:
+    CachedSession = None
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Years to search for
+TARGET_YEARS = ['2022', '2023', '2024']
+TARGET_YEAR_PATTERN = re.compile('|'.join(map(re.escape, TARGET_YEARS)))
+
+# During development, FIJI_HTTP_CACHE=1 routes page fetches through an on-disk
+# cache (when requests-cache is installed) so repeated runs revalidate index
+# pages instead of re-downloading them; PDFs always bypass it
+HTTP_CACHE = 'data/fiji_http_cache'
+HTTP_CACHE_EXPIRE = 3600
+HTTP_CACHE_ENABLED = CachedSession is not None and os.environ.get('FIJI_HTTP_CACHE') == '1'
+
+PDF_ACCEPT = 'application/pdf,text/html,*/*'
+
+# Throttling and transient server errors are retried with jittered exponential
+# backoff, honouring Retry-After when the server sends one
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+BACKOFF_MAX = 32
+try:
+    RETRY = Retry(total=MAX_RETRIES, backoff_factor=1, status_forcelist=RETRY_STATUSES,
+                  backoff_jitter=0.5, backoff_max=BACKOFF_MAX)
+except TypeError:
+    # urllib3 1.26 has no jitter or backoff cap arguments; retries still back off
+    RETRY = Retry(total=MAX_RETRIES, backoff_factor=1, status_forcelist=RETRY_STATUSES)
+
+# The JSON snapshot is shared with the other Fiji scripts; new downloads are
+# appended to the journal and folded into the snapshot at the end of a run
+PROCESSED_FILE = 'data/fiji_processed_hansards.json'
+PROCESSED_JOURNAL = 'data/fiji_processed_hansards.jsonl'
+
+# Returned by a conditional download when the server's copy is unchanged
+NOT_MODIFIED = 'not modified'
+
+def make_session(headers, pool_connections=16, pool_maxsize=16):
+    """Create a pooled keep-alive session with retries, cached when enabled"""
+    if HTTP_CACHE_ENABLED:
+        # URL globs are case-sensitive, so both spellings of the extension are excluded
+        session = CachedSession(HTTP_CACHE, backend='sqlite', expire_after=HTTP_CACHE_EXPIRE,
+                                allowable_methods=('GET',), cache_control=True,
+                                urls_expire_after={'*.pdf': DO_NOT_CACHE, '*.PDF': DO_NOT_CACHE})
+    else:
+        session = requests.Session()
+    session.headers.update(headers)
+    for prefix in ('https://', 'http://'):
+        session.mount(prefix, HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                          max_retries=RETRY))
+    return session
+
+def iter_processed_records():
+    """Yield (filename, record) from the snapshot, then from the journal"""
+    try:
+        with open(PROCESSED_FILE, 'rb') as f:
+            if ijson is not None:
+                # Stream one record at a time instead of loading the whole file
+                yield from ijson.kvitems(f, '', use_float=True)
+            else:
+                yield from json.load(f).items()
+    except FileNotFoundError:
+        pass
+
+    # Replay anything recorded since the last snapshot
+    try:
+        with open(PROCESSED_JOURNAL, 'r') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.pop('file'), record
+    except FileNotFoundError:
+        pass
+
+def load_processed_hansards():
+    """Load the names and content hashes of already processed hansards"""
+    processed = set()
+    known_hashes = {}
+    for filename, record in iter_processed_records():
+        processed.add(filename)
+        if 'sha256' in record and 'duplicate_of' not in record:
+            known_hashes[record['sha256']] = filename
+    return processed, known_hashes
+
+def append_processed(filename, record):
+    """Record one processed hansard by appending a line to the journal"""
+    with open(PROCESSED_JOURNAL, 'a') as f:
+        f.write(json.dumps({'file': filename, **record}) + '\n')
+        # Make the line durable so a crash before the snapshot loses nothing
+        f.flush()
+        os.fsync(f.fileno())
+
+def save_processed_hansards():
+    """Fold the journal into the snapshot and clear it"""
+    processed = dict(iter_processed_records())
+    # Write aside and swap in, so an interrupted save never truncates the
+    # snapshot before the journal is cleared
+    temp_file = f"{PROCESSED_FILE}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(processed, f, indent=2)
+    os.replace(temp_file, PROCESSED_FILE)
+    if os.path.exists(PROCESSED_JOURNAL):
+        os.remove(PROCESSED_JOURNAL)
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number attempt, preferring the server's Retry-After"""
+    if retry_after and retry_after.isdigit():
+        return min(int(retry_after), BACKOFF_MAX)
+    return min(2 ** attempt + random.random() * 0.5, BACKOFF_MAX)
+
+@lru_cache(maxsize=4096)
+def pdf_filename(url):
+    """File name at the end of a URL's path"""
+    return os.path.basename(urlparse(url).path)
+
+def response_validators(headers):
+    """The ETag and Last-Modified of a response, for later conditional requests"""
+    return {key: headers[header]
+            for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+            if header in headers}
+
+def conditional_headers(validators):
+    """Request headers that make a fetch answer 304 if the stored validators still match"""
+    headers = {}
+    if 'etag' in validators:
+        headers['If-None-Match'] = validators['etag']
+    if 'last_modified' in validators:
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+def validators_unchanged(session, url, validators, timeout):
+    """Whether a HEAD shows the file behind url unchanged since validators were stored"""
+    try:
+        response = session.head(url, headers=conditional_headers(validators),
+                                timeout=timeout, allow_redirects=True)
+    except Exception as e:
+        logging.error(f"Error checking {url}: {str(e)}")
+        return True
+    # A failed check proves nothing, so the file is left for the next run
+    if response.status_code == 304 or not response.ok:
+        return True
+    # Servers that ignore conditional requests still echo their validators.
+    # The ETag decides when both sides have one, since Last-Modified only has
+    # one-second resolution and can stay the same across a real change
+    current = response_validators(response.headers)
+    if 'etag' in current and 'etag' in validators:
+        return current['etag'] == validators['etag']
+    return 'last_modified' in current and current['last_modified'] == validators.get('last_modified')
+
+def pdf_fingerprint(digest, size, magic, output_path, validators=None):
+    """Return the sha256, size and validators of a finished download, or drop it if it is not a PDF"""
+    # Error pages served in place of the PDF fail the magic check
+    if size > 1000 and magic == b'%PDF':
+        return {'sha256': digest.hexdigest(), 'size': size, **(validators or {})}
+    os.remove(output_path)
+    return None
+
+def download_pdf(session, url, output_path, timeout, validators=None):
+    """Download a PDF over a session, returning its sha256, size and validators"""
+    try:
+        # Hash while streaming so the file is never read back
+        digest = hashlib.sha256()
+        size = 0
+        magic = b''
+        headers = {'Accept': PDF_ACCEPT, **conditional_headers(validators or {})}
+        with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            # Validators from an earlier download still match: leave the file be
+            if response.status_code == 304:
+                return NOT_MODIFIED
+            response.raise_for_status()
+            with open(output_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    if len(magic) < 4:
+                        magic += chunk[:4 - len(magic)]
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+
+        return pdf_fingerprint(digest, size, magic, output_path, response_validators(response.headers))
+
+    except Exception as e:
+        logging.error(f"Error downloading {url}: {str(e)}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return None
@@ -4,9 +4,11 @@ Fix formatting in Fiji hansard HTML files by improving paragraph structure
 """
 import os
 import re
+import json
 import logging
 from pathlib import Path
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
 
 # Setup logging
 logging.basicConfig(
@@ -22,6 +24,38 @@ logging.basicConfig(
 BASE_DIR = Path("/Users/jacksonkeet/Pacific Hansard Development")
 COLLECTIONS_DIR = BASE_DIR / "collections" / "Fiji"
 
+# Modification times of files found formatted on earlier runs, keyed by path;
+# a file is only read again once it has changed since
+FORMATTED_CACHE = BASE_DIR / "data" / "fiji_formatted_cache.json"
+
+# Patterns are compiled once, as they run against every paragraph of every file
+# Only whitespace that the collapse to a single space would change is matched,
+# so text that is already clean is returned without a rewrite
+WHITESPACE_PATTERN = re.compile(r'\s{2,}|[^\S ]')
+
+# A <br/> whose neighbouring text ends and starts with a letter or digit (in
+# any script, as str.isalnum) breaks a line mid-sentence. The text may sit in
+# the elements just before and after it, so their closing and opening tags
+# are kept. Replacing these in the raw HTML saves editing the parsed tree
+LINE_BREAK_IN_TEXT_PATTERN = re.compile(
+    r'(?<=[^\W_])(?:((?:\s*</[A-Za-z][^>]*>)+)|\s*)<br\s*/?>'
+    r'(?:((?:<(?!br\b)[A-Za-z][^>]*>\s*)+)|\s*)(?=[^\W_])')
+
+# Common patterns for speakers, in one alternation that matches exactly where
+# the first matching pattern would
+SPEAKER_LINE_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in (
+    r'^HON\.\s+[A-Z][A-Z\s\.\'-]*[\.-]\s*$',  # HON. NAME.- or HON. NAME.
+    r'^(MR|MRS|MS|MADAM)\.?\s+SPEAKER[\.-]\s*$',  # MR. SPEAKER.-
+    r'^HON\.\s+.*[\.-]\s*$',  # Any HON. ending with .-
+    r'^[A-Z][A-Z\s\.\'-]+[\.-]\s*$'  # All caps name ending with .- or -
+)))
+
+# Spaces before punctuation, and missing spaces after it. These stay two
+# passes: one alternation needs a Python callback to choose each replacement,
+# which is slower on paragraph text than two template substitutions
+SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r'\s+([.,;:!?])')
+MISSING_SPACE_AFTER_PUNCTUATION_PATTERN = re.compile(r'([.,;:!?])([A-Z])')
+
 def fix_html_formatting(html_content):
     """
     Fix HTML formatting by:
@@ -29,31 +63,27 @@ def fix_html_formatting(html_content):
     2. Removing empty divs and spans
     3. Improving overall structure
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
     # First, let's fix line breaks within text
     # Replace standalone <br/> tags between words with spaces
-    for br in soup.find_all('br'):
-        # Check if br is between text nodes
-        prev_text = br.previous_sibling
-        next_text = br.next_sibling
-        
-        if prev_text and next_text:
-            # Check if previous ends with a character and next starts with a character
-            prev_str = str(prev_text).strip() if isinstance(prev_text, str) else prev_text.get_text().strip()
-            next_str = str(next_text).strip() if isinstance(next_text, str) else next_text.get_text().strip()
-            
-            if prev_str and next_str and prev_str[-1].isalnum() and next_str[0].isalnum():
-                # This is a line break within a word/sentence - replace with space
-                br.replace_with(' ')
+    html_content = LINE_BREAK_IN_TEXT_PATTERN.sub(r'\1 \2', html_content)
     
-    # Create new body content
-    new_body = soup.new_tag('body')
+    # Only the body is rebuilt, so parse just that and keep the rest of the
+    # page as it is
+    body_start = html_content.find('<body')
+    body_end = html_content.rfind('</body>')
+    if body_start != -1 and body_end > body_start:
+        head = html_content[:body_start]
+        tail = html_content[body_end + len('</body>'):]
+        soup = BeautifulSoup(html_content[body_start:body_end + len('</body>')], 'lxml',
+                             parse_only=SoupStrainer('body'))
+    else:
+        head = tail = None
+        soup = BeautifulSoup(html_content, 'lxml')
     
     # Keep the h3 title if present
     h3 = soup.find('h3')
     if h3:
-        new_body.append(h3.extract())
+        h3.extract()
     
     # Collect all text content from divs
     all_content = []
@@ -69,20 +99,24 @@ def fix_html_formatting(html_content):
         text = div.get_text(separator=' ', strip=True)
         if text:
             # Clean up extra spaces
-            text = re.sub(r'\s+', ' ', text)
+            text = WHITESPACE_PATTERN.sub(' ', text)
             all_content.append(('text', text))
     
-    # Process content to create proper paragraphs
+    # Rebuild the body in place, now that everything worth keeping is out of it
+    new_body = soup.body
+    new_body.clear()
+    if h3:
+        new_body.append(h3)
+    
+    # Process content to create proper paragraphs; the collected texts are
+    # already stripped and non-empty, so a section is joined once when emitted
     current_section = []
     
     for content_type, content in all_content:
         if content_type == 'page_marker':
             # Add accumulated paragraphs
             if current_section:
-                para_text = ' '.join(current_section).strip()
-                if para_text:
-                    new_p = create_paragraph(soup, para_text)
-                    new_body.append(new_p)
+                new_body.append(create_paragraph(soup, ' '.join(current_section)))
                 current_section = []
             # Add page marker
             new_body.append(content)
@@ -91,10 +125,7 @@ def fix_html_formatting(html_content):
             if is_section_heading(content):
                 # End current section
                 if current_section:
-                    para_text = ' '.join(current_section).strip()
-                    if para_text:
-                        new_p = create_paragraph(soup, para_text)
-                        new_body.append(new_p)
+                    new_body.append(create_paragraph(soup, ' '.join(current_section)))
                     current_section = []
                 # Add heading
                 new_h4 = soup.new_tag('h4')
@@ -104,10 +135,7 @@ def fix_html_formatting(html_content):
             elif is_speaker_line(content):
                 # End current section
                 if current_section:
-                    para_text = ' '.join(current_section).strip()
-                    if para_text:
-                        new_p = create_paragraph(soup, para_text)
-                        new_body.append(new_p)
+                    new_body.append(create_paragraph(soup, ' '.join(current_section)))
                     current_section = []
                 # Add speaker line
                 new_p = soup.new_tag('p')
@@ -121,16 +149,10 @@ def fix_html_formatting(html_content):
     
     # Handle remaining content
     if current_section:
-        para_text = ' '.join(current_section).strip()
-        if para_text:
-            new_p = create_paragraph(soup, para_text)
-            new_body.append(new_p)
-    
-    # Replace body content
-    soup.body.clear()
-    for child in list(new_body.children):
-        soup.body.append(child)
+        new_body.append(create_paragraph(soup, ' '.join(current_section)))
     
+    if head is not None:
+        return head + str(soup.body) + tail
     return str(soup)
 
 def is_section_heading(text):
@@ -161,19 +183,7 @@ def is_speaker_line(text):
     if len(text) > 100:
         return False
         
-    # Common patterns for speakers
-    patterns = [
-        r'^HON\.\s+[A-Z][A-Z\s\.\'-]*[\.-]\s*$',  # HON. NAME.- or HON. NAME.
-        r'^(MR|MRS|MS|MADAM)\.?\s+SPEAKER[\.-]\s*$',  # MR. SPEAKER.-
-        r'^HON\.\s+.*[\.-]\s*$',  # Any HON. ending with .-
-        r'^[A-Z][A-Z\s\.\'-]+[\.-]\s*$'  # All caps name ending with .- or -
-    ]
-    
-    for pattern in patterns:
-        if re.match(pattern, text):
-            return True
-    
-    return False
+    return SPEAKER_LINE_PATTERN.match(text) is not None
 
 def create_paragraph(soup, text):
     """Create a properly formatted paragraph"""
@@ -182,10 +192,10 @@ def create_paragraph(soup, text):
     
     # Fix common issues
     # Fix spaces before punctuation
-    text = re.sub(r'\s+([.,;:!?])', r'\1', text)
+    text = SPACE_BEFORE_PUNCTUATION_PATTERN.sub(r'\1', text)
     
     # Fix missing spaces after punctuation
-    text = re.sub(r'([.,;:!?])([A-Z])', r'\1 \2', text)
+    text = MISSING_SPACE_AFTER_PUNCTUATION_PATTERN.sub(r'\1 \2', text)
     
     # Create paragraph
     new_p = soup.new_tag('p')
@@ -194,47 +204,85 @@ def create_paragraph(soup, text):
     return new_p
 
 def process_html_file(file_path):
-    """Process a single HTML file"""
+    """Process a single HTML file, returning whether it was fixed and any error"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        # Read in one go and check the raw bytes, so already formatted files
+        # are never decoded
+        raw = file_path.read_bytes()
         
         # Skip if already has proper paragraphs
-        if '<p>' in content:
-            logging.info(f"Skipping {file_path} - already has paragraphs")
-            return False
+        if b'<p>' in raw:
+            return False, None
             
         # Fix formatting
+        content = raw.decode('utf-8')
         fixed_content = fix_html_formatting(content)
+        if fixed_content == content:
+            return False, None
         
         # Write back
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(fixed_content)
+        file_path.write_bytes(fixed_content.encode('utf-8'))
             
-        logging.info(f"Fixed formatting in {file_path}")
-        return True
+        return True, None
         
     except Exception as e:
-        logging.error(f"Error processing {file_path}: {str(e)}")
-        return False
+        return False, str(e)
+
+def load_formatted_cache():
+    """Load the modification times of files already found formatted"""
+    try:
+        with open(FORMATTED_CACHE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_formatted_cache(cache):
+    """Write the formatted-file times aside and swap them in"""
+    FORMATTED_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = f"{FORMATTED_CACHE}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(temp_file, FORMATTED_CACHE)
 
 def process_all_fiji_hansards():
     """Process all Fiji hansard HTML files"""
     total_files = 0
     fixed_files = 0
+    unchanged = 0
+    cache = load_formatted_cache()
     
-    # Find all HTML files in Fiji collections
+    # Find all HTML files in Fiji collections, skipping contents.html files and,
+    # with a single stat, any already formatted and untouched since
+    html_files = []
     for html_file in COLLECTIONS_DIR.rglob("*.html"):
-        # Skip contents.html files
         if html_file.name == "contents.html":
             continue
-            
         total_files += 1
-        if process_html_file(html_file):
-            fixed_files += 1
+        if cache.get(str(html_file), -1) >= html_file.stat().st_mtime:
+            unchanged += 1
+            continue
+        html_files.append(html_file)
+    
+    # Each file is independent, so fix them across all cores; logging stays
+    # in this process so workers never write to the log file concurrently
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(process_html_file, html_files, chunksize=16)
+        for html_file, (fixed, error) in zip(html_files, results):
+            if error:
+                logging.error(f"Error processing {html_file}: {error}")
+                continue
+            if fixed:
+                logging.info(f"Fixed formatting in {html_file}")
+                fixed_files += 1
+            else:
+                logging.info(f"Skipping {html_file} - already formatted")
+            # Stamp after any rewrite, so the next run skips the file unread
+            cache[str(html_file)] = html_file.stat().st_mtime
+    
+    save_formatted_cache(cache)
     
     logging.info(f"\nProcessing complete!")
-    logging.info(f"Total files: {total_files}")
+    logging.info(f"Total files: {total_files} ({unchanged} unchanged since last run)")
     logging.info(f"Fixed files: {fixed_files}")
     logging.info(f"Already formatted: {total_files - fixed_files}")
 
@@ -4,7 +4,12 @@ Fix speaker extraction for Fiji hansards by re-processing metadata files
 """
 import os
 import re
+import sys
+import json
+import heapq
+import hashlib
 import logging
+from functools import lru_cache
 from collections import defaultdict
 
 logging.basicConfig(
@@ -12,29 +17,71 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+@lru_cache(maxsize=4096)
 def normalize_name(name):
     """Remove all spaces and convert to uppercase for comparison"""
     return ''.join(name.split()).upper()
 
+# Improved patterns for Fiji format, compiled once for every line of every part
+SPEAKER_PATTERNS = [
+    # HON. NAME.- format (with period-dash)
+    re.compile(r'HON\.\s+([A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*)\.?-', re.MULTILINE),
+    # HON. TITLE.- format 
+    re.compile(r'HON\.\s+((?:PRIME MINISTER|MINISTER|LEADER|ATTORNEY-GENERAL|SPEAKER|DEPUTY SPEAKER)[A-Z\s\'-]*)\.?-', re.MULTILINE),
+    # MR/MRS/MS SPEAKER format
+    re.compile(r'(MR\.?|MRS\.?|MS\.?|MADAM)\s+SPEAKER\.?-', re.MULTILINE),
+    # Simple NAME.- format at start of paragraph
+    re.compile(r'^\s*([A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*)\.?-', re.MULTILINE),
+    # HON. with colon (old format)
+    re.compile(r'HON\.\s+([A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*):', re.MULTILINE),
+]
+
+PART_NUMBER_PATTERN = re.compile(r'part(\d+)')
+
+# Per-day results of earlier runs, keyed by day directory; a day is only
+# re-scanned when it or one of its part files has changed since
+SUMMARY_CACHE = 'data/summary_cache.json'
+# Cached results only hold for the patterns that produced them
+PATTERNS_KEY = hashlib.sha256('\n'.join(f"{pattern.flags}:{pattern.pattern}"
+                                         for pattern in SPEAKER_PATTERNS).encode('utf-8')).hexdigest()
+
+@lru_cache(maxsize=65536)
+def speakers_in_line(line):
+    """Return (name, normalized name) for each speaker named on a line"""
+    found = []
+    for pattern in SPEAKER_PATTERNS:
+        matches = pattern.findall(line)
+        for match in matches:
+            if isinstance(match, tuple):
+                name = ' '.join(m for m in match if m).strip()
+            else:
+                name = match.strip()
+            
+            # Clean up the name
+            name = name.rstrip('.-:').strip()
+            
+            # Handle special cases
+            if 'SPEAKER' in name and not any(title in name for title in ['DEPUTY', 'ASSISTANT']):
+                name = 'MR SPEAKER'
+            elif name == 'SPEAKER':
+                name = 'MR SPEAKER'
+            
+            normalized = normalize_name(name)
+            
+            # Filter out noise
+            if (normalized and 
+                len(normalized) > 2 and
+                not normalized.isdigit() and
+                not all(c in '.,!?;:-' for c in normalized)):
+                found.append((name, normalized))
+    
+    return tuple(found)
+
 def extract_speakers_improved(content):
     """Extract speakers with improved patterns for Fiji hansards"""
     speakers = []
     seen = set()
     
-    # Improved patterns for Fiji format
-    patterns = [
-        # HON. NAME.- format (with period-dash)
-        r'HON\.\s+([A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*)\.?-',
-        # HON. TITLE.- format 
-        r'HON\.\s+((?:PRIME MINISTER|MINISTER|LEADER|ATTORNEY-GENERAL|SPEAKER|DEPUTY SPEAKER)[A-Z\s\'-]*)\.?-',
-        # MR/MRS/MS SPEAKER format
-        r'(MR\.?|MRS\.?|MS\.?|MADAM)\s+SPEAKER\.?-',
-        # Simple NAME.- format at start of paragraph
-        r'^\s*([A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*)\.?-',
-        # HON. with colon (old format)
-        r'HON\.\s+([A-Z][A-Z.\s\'-]+(?:\s[A-Z][a-z]+)*):',
-    ]
-    
     # Split content into lines for better matching
     lines = content.split('\n')
     
@@ -42,46 +89,28 @@ def extract_speakers_improved(content):
         # Skip empty lines
         if not line.strip():
             continue
-            
-        for pattern in patterns:
-            matches = re.findall(pattern, line, re.MULTILINE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    name = ' '.join(m for m in match if m).strip()
-                else:
-                    name = match.strip()
-                
-                # Clean up the name
-                name = name.rstrip('.-:').strip()
-                
-                # Handle special cases
-                if 'SPEAKER' in name and not any(title in name for title in ['DEPUTY', 'ASSISTANT']):
-                    name = 'MR SPEAKER'
-                elif name == 'SPEAKER':
-                    name = 'MR SPEAKER'
-                
-                normalized = normalize_name(name)
-                
-                # Filter out noise
-                if (normalized and 
-                    normalized not in seen and 
-                    len(normalized) > 2 and
-                    not normalized.isdigit() and
-                    not all(c in '.,!?;:-' for c in normalized)):
-                    seen.add(normalized)
-                    speakers.append(name)
+        
+        # Every pattern ends a name with '-' or ':', so a line with neither
+        # cannot name a speaker and is skipped without any regex
+        if '-' not in line and ':' not in line:
+            continue
+        
+        # Speaker lines and boilerplate recur across the parts of a day, so
+        # each distinct line is only run through the patterns once
+        for name, normalized in speakers_in_line(line):
+            if normalized not in seen:
+                seen.add(normalized)
+                speakers.append(name)
     
     return sorted(speakers)
 
-def process_hansard_directory(hansard_dir):
-    """Process a single hansard directory and update metadata"""
+def process_hansard_directory(hansard_dir, part_files):
+    """Process a single hansard directory and update metadata, returning the speakers written"""
     updated_count = 0
-    
-    # Find all part HTML files
-    part_files = [f for f in os.listdir(hansard_dir) if f.startswith('part') and f.endswith('.html')]
+    day_speakers = set()
     
     for part_file in part_files:
-        part_num = re.search(r'part(\d+)', part_file)
+        part_num = PART_NUMBER_PATTERN.search(part_file)
         if not part_num:
             continue
             
@@ -103,11 +132,56 @@ def process_hansard_directory(hansard_dir):
                 for i, speaker in enumerate(speakers, 1):
                     f.write(f"Speaker {i}: {speaker}\n")
                 updated_count += 1
+                # Names repeat across thousands of parts; share one string per name
+                day_speakers.update(map(sys.intern, speakers))
             else:
                 f.write("Speaker 1: No speakers identified\n")
             f.write("\n")
     
-    return updated_count
+    return updated_count, day_speakers
+
+def subdirectories(path):
+    """Directory entries directly under path, typed from the directory listing itself"""
+    with os.scandir(path) as entries:
+        return [entry for entry in entries if entry.is_dir()]
+
+def scan_day(day_path):
+    """List a day directory once for its part HTML files and their latest mtime"""
+    part_files = []
+    parts_mtime = 0
+    with os.scandir(day_path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('part') and name.endswith('.html'):
+                part_files.append(name)
+                parts_mtime = max(parts_mtime, entry.stat().st_mtime)
+    return part_files, parts_mtime
+
+def load_summary_cache():
+    """Load the per-day results of earlier runs made with the current patterns"""
+    try:
+        with open(SUMMARY_CACHE, 'r') as f:
+            saved = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    
+    if not isinstance(saved, dict) or saved.get('patterns') != PATTERNS_KEY:
+        logging.info("Speaker patterns changed since the last run, re-scanning every day")
+        return {}
+    cache = saved['days']
+    
+    # The same speakers recur across days, so keep one copy of each name
+    for day in cache.values():
+        day['speakers'] = [sys.intern(speaker) for speaker in day['speakers']]
+    return cache
+
+def save_summary_cache(cache):
+    """Write the per-day results aside and swap them in"""
+    os.makedirs(os.path.dirname(SUMMARY_CACHE), exist_ok=True)
+    temp_file = f"{SUMMARY_CACHE}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump({'patterns': PATTERNS_KEY, 'days': cache}, f, indent=2)
+    os.replace(temp_file, SUMMARY_CACHE)
 
 def fix_all_speaker_metadata():
     """Fix speaker metadata for all 2023-2024 Fiji hansards"""
@@ -116,6 +190,8 @@ def fix_all_speaker_metadata():
     total_updated = 0
     total_hansards = 0
     all_speakers = set()
+    unchanged = 0
+    cache = load_summary_cache()
     
     logging.info("Starting speaker extraction fix...")
     
@@ -124,39 +200,42 @@ def fix_all_speaker_metadata():
         if not os.path.isdir(year_path):
             continue
             
-        for month in os.listdir(year_path):
-            month_path = os.path.join(year_path, month)
-            if not os.path.isdir(month_path):
-                continue
+        for month in subdirectories(year_path):
+            for day in subdirectories(month.path):
+                total_hansards += 1
                 
-            for day in os.listdir(month_path):
-                day_path = os.path.join(year_path, month, day)
-                if not os.path.isdir(day_path):
+                part_files, parts_mtime = scan_day(day.path)
+                
+                # Reuse the last run's results if nothing changed since
+                cached = cache.get(day.path)
+                if cached and cached['mtime'] >= max(day.stat().st_mtime, parts_mtime):
+                    all_speakers.update(cached['speakers'])
+                    unchanged += 1
                     continue
                 
-                logging.info(f"Processing {year}/{month}/{day}")
-                updated = process_hansard_directory(day_path)
+                logging.info(f"Processing {year}/{month.name}/{day.name}")
+                # The speakers come back from the writer, so the metadata files
+                # are not read back for the summary
+                updated, day_speakers = process_hansard_directory(day.path, part_files)
                 total_updated += updated
-                total_hansards += 1
+                all_speakers.update(day_speakers)
                 
-                # Collect all speakers for summary
-                for file in os.listdir(day_path):
-                    if file.endswith('_metadata.txt'):
-                        with open(os.path.join(day_path, file), 'r') as f:
-                            content = f.read()
-                            speakers = re.findall(r'Speaker \d+: (.+)', content)
-                            for speaker in speakers:
-                                if speaker != "No speakers identified":
-                                    all_speakers.add(speaker)
+                # Stamp after processing, since new metadata files touch the directory
+                cache[day.path] = {
+                    'mtime': max(os.stat(day.path).st_mtime, parts_mtime),
+                    'speakers': sorted(day_speakers)
+                }
+    
+    save_summary_cache(cache)
     
     logging.info(f"\nSpeaker extraction fix complete!")
-    logging.info(f"Total hansards processed: {total_hansards}")
-    logging.info(f"Parts with speakers updated: {total_updated}")
+    logging.info(f"Total hansards processed: {total_hansards} ({unchanged} unchanged since last run)")
+    logging.info(f"Parts rewritten with speakers: {total_updated}")
     logging.info(f"Total unique speakers found: {len(all_speakers)}")
     
     if all_speakers:
         logging.info("\nSample speakers found:")
-        for speaker in sorted(list(all_speakers))[:20]:
+        for speaker in heapq.nsmallest(20, all_speakers):
             logging.info(f"  - {speaker}")
 
 if __name__ == "__main__":
@@ -7,114 +7,176 @@ paragraph structure, speaker identification, and overall readability.
 
 import os
 import re
-from bs4 import BeautifulSoup, NavigableString
-import glob
+from lxml import etree, html
+from concurrent.futures import ProcessPoolExecutor
+
+# Each classifier's patterns are compiled once into a single alternation, so a
+# paragraph is classified in one match; alternatives are tried in order, so it
+# matches exactly where the first matching pattern would
+PAGE_MARKER_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in (
+    r'^Page \d+$',
+    r'^\d+$',  # Just numbers (like "484", "485")
+    r'^\d+\s+Questions$',
+    r'^Questions\s+\d+$',
+    r'^\d+th\s+\w+\.,\s+\d{4}$'  # Date patterns like "10th Feb., 2021"
+)), re.IGNORECASE)
+
+# More comprehensive speaker patterns
+SPEAKER_LINE_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in (
+    r'^(HON\.\s+[A-Z][A-Z\s.\'-]+)(\s*\([^)]+\))?[:\-.]',  # HON. NAME (Title):
+    r'^(MR\.\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
+    r'^(MADAM\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
+    r'^(DR\.\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
+    r'^(MRS\.\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
+    r'^(MS\.\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
+    r'^(HON\.\s+SPEAKER)[:\-.]',
+    r'^(HON\.\s+DEPUTY\s+SPEAKER)[:\-.]',
+    r'^(HON\.\s+ACTING\s+SPEAKER)[:\-.]',
+    r'^(HON\.\s+ASSISTANT\s+MINISTER[^:]+)[:\-.]',
+    r'^(HON\.\s+MINISTER[^:]+)[:\-.]',
+    r'^(HON\.\s+ATTORNEY-GENERAL)[:\-.]',
+    r'^(HON\.\s+PRIME\s+MINISTER)[:\-.]',
+    r'^(HON\.\s+LEADER\s+OF[^:]+)[:\-.]'
+)), re.IGNORECASE)
+
+# Speaker name and the dialogue that follows it on the same line; each
+# alternative is wrapped in a group just ahead of its own name and dialogue groups
+SPEAKER_DIALOGUE_PATTERN = re.compile('|'.join(f'({pattern})' for pattern in (
+    r'^(HON\.\s+[A-Z][A-Z\s.\'-]+(?:\s*\([^)]+\))?)[\s:\-.]+(.*)$',
+    r'^(MR\.\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
+    r'^(MADAM\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
+    r'^(DR\.\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
+    r'^(MRS\.\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
+    r'^(MS\.\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
+    r'^(HON\.\s+SPEAKER)[\s:\-.]+(.*)$',
+    r'^(HON\.\s+[A-Z\s.\'-]+)[\s:\-.]+(.*)$'
+)), re.IGNORECASE)
+
+PROCEDURAL_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in (
+    r'^Question put\.?$',
+    r'^Motion agreed to\.?$',
+    r'^Motion (carried|passed|lost)\.?$',
+    r'^Vote recorded\.?$',
+    r'^House adjourned\.?$',
+    r'^The (House|Parliament) (met|resumed).*$',
+    r'^\(.*\)$',  # Text in parentheses
+    r'^Amendment.*$',
+    r'^Division.*$'
+)), re.IGNORECASE)
+
+SECTION_HEADING_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in (
+    r'^[A-Z][A-Z\s]+$',  # All caps
+    r'^ORAL QUESTIONS?$',
+    r'^WRITTEN QUESTIONS?$',
+    r'^MINISTERIAL STATEMENTS?$',
+    r'^BILLS?$',
+    r'^MOTIONS?$',
+    r'^MINUTES?$',
+    r'^MESSAGES?$',
+    r'^PAPERS?$',
+    r'^PRESENTATION OF.*$',
+    r'^DEBATE ON.*$',
+    r'^RESUMPTION OF DEBATE.*$',
+    r'^Question No\.\s*\d+.*$',
+    r'^\(Question No\.\s*\d+/\d+\)$'
+)), re.IGNORECASE)
+
+# Sentence boundaries, and sentences that end in an abbreviation instead
+SENTENCE_BREAK_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+ABBREVIATION_END_PATTERN = re.compile(r'\b(Mr|Mrs|Ms|Dr|Hon|Sr|Jr|vs|etc|i\.e|e\.g)\.$')
+# Natural paragraph breaks, and phrases that close a paragraph of a speech
+PARAGRAPH_BREAK_PATTERN = re.compile(r'\s{2,}|\n\n')
+SPEECH_BREAK_PATTERN = re.compile(r'(Mr\.\s*Speaker|Honourable Members?|Sir|Madam)', re.IGNORECASE)
+
+# Stylesheet written into every enhanced page
+STYLE_CSS = """
+        body { 
+            font-family: Arial, sans-serif; 
+            line-height: 1.8; 
+            padding: 20px; 
+            max-width: 900px; 
+            margin: 0 auto;
+            color: #333;
+        }
+        h3 { 
+            color: #1a1a1a;
+            margin-top: 30px;
+            margin-bottom: 20px;
+            font-size: 1.8em;
+        }
+        h4 {
+            color: #2c2c2c;
+            margin-top: 25px;
+            margin-bottom: 15px;
+            font-size: 1.3em;
+            font-weight: 600;
+        }
+        p { 
+            margin-bottom: 18px;
+            text-align: justify;
+        }
+        .speech-block {
+            margin-bottom: 25px;
+            padding-left: 20px;
+            border-left: 3px solid #e0e0e0;
+        }
+        .speaker-name {
+            font-weight: bold;
+            color: #0066cc;
+            margin-bottom: 10px;
+            font-size: 1.1em;
+        }
+        .speech-content p {
+            margin-bottom: 15px;
+        }
+        .procedural {
+            text-align: center;
+            margin: 20px 0;
+            color: #666;
+            font-style: italic;
+        }
+        .question-number {
+            font-weight: bold;
+            color: #666;
+            margin-bottom: 15px;
+        }
+        """
 
 def is_page_marker(text):
     """Check if text is a page number or marker"""
-    patterns = [
-        r'^Page \d+$',
-        r'^\d+$',  # Just numbers (like "484", "485")
-        r'^\d+\s+Questions$',
-        r'^Questions\s+\d+$',
-        r'^\d+th\s+\w+\.,\s+\d{4}$'  # Date patterns like "10th Feb., 2021"
-    ]
-    return any(re.match(pattern, text.strip(), re.IGNORECASE) for pattern in patterns)
+    return PAGE_MARKER_PATTERN.match(text.strip()) is not None
 
 def is_speaker_line(text):
     """Enhanced speaker detection"""
-    # More comprehensive speaker patterns
-    speaker_patterns = [
-        r'^(HON\.\s+[A-Z][A-Z\s.\'-]+)(\s*\([^)]+\))?[:\-.]',  # HON. NAME (Title):
-        r'^(MR\.\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
-        r'^(MADAM\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
-        r'^(DR\.\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
-        r'^(MRS\.\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
-        r'^(MS\.\s+[A-Z][A-Z\s.\'-]+)[:\-.]',
-        r'^(HON\.\s+SPEAKER)[:\-.]',
-        r'^(HON\.\s+DEPUTY\s+SPEAKER)[:\-.]',
-        r'^(HON\.\s+ACTING\s+SPEAKER)[:\-.]',
-        r'^(HON\.\s+ASSISTANT\s+MINISTER[^:]+)[:\-.]',
-        r'^(HON\.\s+MINISTER[^:]+)[:\-.]',
-        r'^(HON\.\s+ATTORNEY-GENERAL)[:\-.]',
-        r'^(HON\.\s+PRIME\s+MINISTER)[:\-.]',
-        r'^(HON\.\s+LEADER\s+OF[^:]+)[:\-.]'
-    ]
-    
-    text = text.strip()
-    for pattern in speaker_patterns:
-        if re.match(pattern, text, re.IGNORECASE):
-            return True
-    return False
+    return SPEAKER_LINE_PATTERN.match(text.strip()) is not None
 
 def extract_speaker_and_dialogue(text):
     """Extract speaker name and their dialogue from a line"""
-    for pattern in [
-        r'^(HON\.\s+[A-Z][A-Z\s.\'-]+(?:\s*\([^)]+\))?)[\s:\-.]+(.*)$',
-        r'^(MR\.\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
-        r'^(MADAM\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
-        r'^(DR\.\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
-        r'^(MRS\.\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
-        r'^(MS\.\s+[A-Z][A-Z\s.\'-]+)[\s:\-.]+(.*)$',
-        r'^(HON\.\s+SPEAKER)[\s:\-.]+(.*)$',
-        r'^(HON\.\s+[A-Z\s.\'-]+)[\s:\-.]+(.*)$'
-    ]:
-        match = re.match(pattern, text.strip(), re.IGNORECASE)
-        if match:
-            return match.group(1).strip(), match.group(2).strip()
+    match = SPEAKER_DIALOGUE_PATTERN.match(text.strip())
+    if match:
+        # The matched alternative's group closes last, after its inner groups
+        return match.group(match.lastindex + 1).strip(), match.group(match.lastindex + 2).strip()
     return None, text
 
 def is_procedural_text(text):
     """Check if text is procedural (e.g., 'Question put.', 'Motion agreed to.')"""
-    procedural_patterns = [
-        r'^Question put\.?$',
-        r'^Motion agreed to\.?$',
-        r'^Motion (carried|passed|lost)\.?$',
-        r'^Vote recorded\.?$',
-        r'^House adjourned\.?$',
-        r'^The (House|Parliament) (met|resumed).*$',
-        r'^\(.*\)$',  # Text in parentheses
-        r'^Amendment.*$',
-        r'^Division.*$'
-    ]
-    return any(re.match(pattern, text.strip(), re.IGNORECASE) for pattern in procedural_patterns)
+    return PROCEDURAL_PATTERN.match(text.strip()) is not None
 
 def is_section_heading(text):
     """Check if text is a section heading"""
-    heading_patterns = [
-        r'^[A-Z][A-Z\s]+$',  # All caps
-        r'^ORAL QUESTIONS?$',
-        r'^WRITTEN QUESTIONS?$',
-        r'^MINISTERIAL STATEMENTS?$',
-        r'^BILLS?$',
-        r'^MOTIONS?$',
-        r'^MINUTES?$',
-        r'^MESSAGES?$',
-        r'^PAPERS?$',
-        r'^PRESENTATION OF.*$',
-        r'^DEBATE ON.*$',
-        r'^RESUMPTION OF DEBATE.*$',
-        r'^Question No\.\s*\d+.*$',
-        r'^\(Question No\.\s*\d+/\d+\)$'
-    ]
-    
     text = text.strip()
     # Check if it's short (less than 50 chars) and matches a pattern
-    if len(text) < 50:
-        for pattern in heading_patterns:
-            if re.match(pattern, text, re.IGNORECASE):
-                return True
-    return False
+    return len(text) < 50 and SECTION_HEADING_PATTERN.match(text) is not None
 
 def split_into_sentences(text):
     """Split text into sentences for better paragraph formation"""
     # Improved sentence splitting that handles abbreviations
-    sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', text)
+    sentences = SENTENCE_BREAK_PATTERN.split(text)
     # Further split on common sentence boundaries
     result = []
     for sentence in sentences:
         # Don't split on common abbreviations
-        if not re.search(r'\b(Mr|Mrs|Ms|Dr|Hon|Sr|Jr|vs|etc|i\.e|e\.g)\.$', sentence):
+        if not ABBREVIATION_END_PATTERN.search(sentence):
             result.append(sentence)
         else:
             # If it ends with an abbreviation, combine with next sentence
@@ -127,7 +189,7 @@ def split_into_sentences(text):
 def create_paragraphs_from_speech(text):
     """Split long speeches into logical paragraphs"""
     # Split by double spaces or specific markers
-    paragraphs = re.split(r'\s{2,}|\n\n', text)
+    paragraphs = PARAGRAPH_BREAK_PATTERN.split(text)
     
     # If no natural breaks, split by sentences and group
     if len(paragraphs) == 1 and len(text) > 500:
@@ -139,45 +201,35 @@ def create_paragraphs_from_speech(text):
             current_para.append(sentence)
             # Create paragraph every 3-4 sentences or at natural breaks
             if (len(current_para) >= 3 or 
-                re.search(r'(Mr\.\s*Speaker|Honourable Members?|Sir|Madam)', sentence, re.IGNORECASE)):
+                SPEECH_BREAK_PATTERN.search(sentence)):
                 paragraphs.append(' '.join(current_para))
                 current_para = []
         
         if current_para:
             paragraphs.append(' '.join(current_para))
     
-    return [p.strip() for p in paragraphs if p.strip()]
+    return [p for p in map(str.strip, paragraphs) if p]
 
 def enhance_fiji_html(html_content):
     """Main function to enhance Fiji hansard HTML formatting"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+    # Work on lxml elements directly; the parser always supplies <html>
+    root = html.document_fromstring(html_content)
     
     # Process existing content
-    body = soup.find('body')
-    if not body:
+    body = root.find('body')
+    if body is None:
         # If there's no body tag, create one
-        body = soup.new_tag('body')
-        # Move all content into the body
-        for element in list(soup.children):
-            if element.name and element.name not in ['html', 'head']:
-                body.append(element.extract())
-        
-        # Find or create html tag
-        html_tag = soup.find('html')
-        if not html_tag:
-            html_tag = soup.new_tag('html')
-            soup.append(html_tag)
-        
-        html_tag.append(body)
+        body = etree.SubElement(root, 'body')
     
     # Create a new body for reformatted content
-    new_body = soup.new_tag('body')
+    new_body = etree.Element('body')
     
     current_speaker = None
     current_speech_parts = []
     
-    for element in body.find_all(['h3', 'h4', 'p']):
-        text = element.get_text(strip=True)
+    # Listed up front, since headings are moved out of the tree as we go
+    for element in list(body.iter('h3', 'h4', 'p')):
+        text = ''.join(part.strip() for part in element.itertext())
         
         if not text:
             continue
@@ -187,7 +239,7 @@ def enhance_fiji_html(html_content):
             continue
         
         # Handle existing headings
-        if element.name in ['h3', 'h4']:
+        if element.tag in ['h3', 'h4']:
             # Flush any pending speech
             if current_speaker and current_speech_parts:
                 create_speech_block(new_body, current_speaker, current_speech_parts)
@@ -195,6 +247,8 @@ def enhance_fiji_html(html_content):
                 current_speech_parts = []
             
             new_body.append(element)
+            # The text that followed it belongs to the old body
+            element.tail = None
             continue
         
         # Check for section headings
@@ -205,9 +259,7 @@ def enhance_fiji_html(html_content):
                 current_speaker = None
                 current_speech_parts = []
             
-            new_h4 = soup.new_tag('h4')
-            new_h4.string = text
-            new_body.append(new_h4)
+            etree.SubElement(new_body, 'h4').text = text
             continue
         
         # Check for speaker lines
@@ -228,12 +280,8 @@ def enhance_fiji_html(html_content):
                 current_speaker = None
                 current_speech_parts = []
             
-            proc_p = soup.new_tag('p')
-            proc_p['class'] = 'procedural'
-            em = soup.new_tag('em')
-            em.string = text
-            proc_p.append(em)
-            new_body.append(proc_p)
+            proc_p = etree.SubElement(new_body, 'p', {'class': 'procedural'})
+            etree.SubElement(proc_p, 'em').text = text
         
         # Regular content - accumulate for current speaker
         else:
@@ -241,139 +289,87 @@ def enhance_fiji_html(html_content):
                 current_speech_parts.append(text)
             else:
                 # No current speaker, create a regular paragraph
-                p = soup.new_tag('p')
-                p.string = text
-                new_body.append(p)
+                etree.SubElement(new_body, 'p').text = text
     
     # Don't forget the last speech
     if current_speaker and current_speech_parts:
         create_speech_block(new_body, current_speaker, current_speech_parts)
     
     # Replace old body with new body
-    body.replace_with(new_body)
+    body.getparent().replace(body, new_body)
     
     # Add improved CSS
-    style = soup.find('style')
-    if style:
-        style.string = """
-        body { 
-            font-family: Arial, sans-serif; 
-            line-height: 1.8; 
-            padding: 20px; 
-            max-width: 900px; 
-            margin: 0 auto;
-            color: #333;
-        }
-        h3 { 
-            color: #1a1a1a;
-            margin-top: 30px;
-            margin-bottom: 20px;
-            font-size: 1.8em;
-        }
-        h4 {
-            color: #2c2c2c;
-            margin-top: 25px;
-            margin-bottom: 15px;
-            font-size: 1.3em;
-            font-weight: 600;
-        }
-        p { 
-            margin-bottom: 18px;
-            text-align: justify;
-        }
-        .speech-block {
-            margin-bottom: 25px;
-            padding-left: 20px;
-            border-left: 3px solid #e0e0e0;
-        }
-        .speaker-name {
-            font-weight: bold;
-            color: #0066cc;
-            margin-bottom: 10px;
-            font-size: 1.1em;
-        }
-        .speech-content p {
-            margin-bottom: 15px;
-        }
-        .procedural {
-            text-align: center;
-            margin: 20px 0;
-            color: #666;
-            font-style: italic;
-        }
-        .question-number {
-            font-weight: bold;
-            color: #666;
-            margin-bottom: 15px;
-        }
-        """
+    style = root.find('.//style')
+    if style is not None:
+        style.text = STYLE_CSS
     
-    return str(soup)
+    # Keep the source's doctype, without lxml's default for pages that had none
+    doctype = root.getroottree().docinfo.doctype if html_content.lstrip()[:9].upper() == '<!DOCTYPE' else None
+    return html.tostring(root, encoding='unicode', doctype=doctype)
 
 def create_speech_block(parent, speaker, speech_parts):
     """Create a formatted speech block"""
-    # Get the BeautifulSoup object from the parent element
-    soup = parent
-    while soup.parent:
-        soup = soup.parent
-    
     # Create speech container
-    speech_div = soup.new_tag('div')
-    speech_div['class'] = 'speech-block'
+    speech_div = etree.SubElement(parent, 'div', {'class': 'speech-block'})
     
     # Add speaker name
-    speaker_p = soup.new_tag('p')
-    speaker_p['class'] = 'speaker-name'
-    speaker_p.string = speaker + ":"
-    speech_div.append(speaker_p)
+    etree.SubElement(speech_div, 'p', {'class': 'speaker-name'}).text = speaker + ":"
     
     # Add speech content
-    content_div = soup.new_tag('div')
-    content_div['class'] = 'speech-content'
+    content_div = etree.SubElement(speech_div, 'div', {'class': 'speech-content'})
     
-    # Combine all speech parts and split into paragraphs
+    # Combine all speech parts and split into paragraphs, which come back
+    # stripped and non-empty
     full_speech = ' '.join(speech_parts)
-    paragraphs = create_paragraphs_from_speech(full_speech)
-    
-    for para_text in paragraphs:
-        if para_text:
-            p = soup.new_tag('p')
-            p.string = para_text
-            content_div.append(p)
+    for para_text in create_paragraphs_from_speech(full_speech):
+        etree.SubElement(content_div, 'p').text = para_text
+
+def enhance_fiji_file(file_path):
+    """Enhance one hansard HTML file in place, returning its path, whether it was processed and any error"""
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        
+        # Check if this is a Fiji hansard file (simple check), on the raw bytes
+        # so files that are skipped are never decoded
+        if b'<body>' in raw or b'<h3>' in raw:
+            enhanced_content = enhance_fiji_html(raw.decode('utf-8'))
+            
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(enhanced_content)
+            
+            return file_path, True, None
+        return file_path, False, None
     
-    speech_div.append(content_div)
-    parent.append(speech_div)
+    except Exception as e:
+        return file_path, False, str(e)
+
+def iter_html_files(directory):
+    """Yield the hansard HTML files under a directory"""
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            # Skip contents.html files
+            if name.endswith('.html') and 'contents.html' not in name:
+                yield os.path.join(dirpath, name)
 
 def process_fiji_hansard_files(directory):
     """Process all Fiji hansard HTML files in a directory"""
-    html_files = glob.glob(os.path.join(directory, '**/*.html'), recursive=True)
-    
     processed = 0
     errors = 0
     
-    for file_path in html_files:
-        # Skip contents.html files
-        if 'contents.html' in file_path:
-            continue
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Check if this is a Fiji hansard file (simple check)
-            if '<body>' in content or '<h3>' in content:
-                enhanced_content = enhance_fiji_html(content)
-                
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(enhanced_content)
-                
+    html_files = list(iter_html_files(directory))
+    
+    # Enhance files across all cores and report from this process
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(enhance_fiji_file, html_files, chunksize=16)
+        for file_path, enhanced, error in results:
+            if error:
+                print(f"Error processing {file_path}: {error}")
+                errors += 1
+            elif enhanced:
                 processed += 1
                 if processed % 100 == 0:
                     print(f"Processed {processed} files...")
-        
-        except Exception as e:
-            print(f"Error processing {file_path}: {str(e)}")
-            errors += 1
     
     print(f"\nProcessing complete!")
     print(f"Files processed: {processed}")
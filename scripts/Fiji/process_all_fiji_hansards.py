@@ -5,12 +5,14 @@ Converts PDFs to HTML and processes them to collections structure
 """
 
 import os
+import sys
 import logging
+import importlib.util
 from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pdfminer.high_level import extract_text_to_fp
 from pdfminer.layout import LAParams
-from io import StringIO
-import subprocess
 
 # Setup logging
 logging.basicConfig(
@@ -26,23 +28,53 @@ logging.basicConfig(
 os.makedirs('logs', exist_ok=True)
 os.makedirs('html_hansards', exist_ok=True)
 
+# Load the integrated converter once, so each hansard is a function call
+# rather than a fresh interpreter re-importing bs4 and lxml
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+converter_path = os.path.join(SCRIPT_DIR, "fiji-hansard-converter-integrated.py")
+spec = importlib.util.spec_from_file_location("fiji_hansard_converter_integrated", converter_path)
+converter = importlib.util.module_from_spec(spec)
+sys.modules["fiji_hansard_converter_integrated"] = converter
+spec.loader.exec_module(converter)
+
+# Hansards are single-column text, so skip pdfminer's text box reordering,
+# the most expensive layout pass, and keep vertical text detection off
+LAYOUT_PARAMS = LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+
 def pdf_to_html(pdf_path, html_path):
     """Convert PDF to HTML using pdfminer"""
     try:
-        output_string = StringIO()
-        with open(pdf_path, 'rb') as fin:
-            extract_text_to_fp(fin, output_string, laparams=LAParams(), 
-                             output_type='html', codec=None)
-        
-        with open(html_path, 'w', encoding='utf-8') as fout:
-            fout.write(output_string.getvalue())
+        # Stream the HTML straight to disk rather than building it in memory
+        with open(pdf_path, 'rb') as fin, open(html_path, 'wb') as fout:
+            extract_text_to_fp(fin, fout, laparams=LAYOUT_PARAMS, output_type='html', codec='utf-8')
         
-        logging.info(f"Converted {pdf_path} to {html_path}")
         return True
     except Exception as e:
         logging.error(f"Error converting {pdf_path}: {str(e)}")
+        # Drop any partial output so it is not mistaken for a finished conversion
+        if os.path.exists(html_path):
+            os.remove(html_path)
         return False
 
+def pdf_to_html_worker(task):
+    """Process pool entry point taking a (pdf_path, html_path) pair"""
+    return pdf_to_html(*task)
+
+def convert_hansards_worker(html_files):
+    """Process pool entry point running the converter over hansards that share an output day"""
+    results = []
+    for html_file in html_files:
+        try:
+            results.append((html_file, converter.process_hansard(html_file), None))
+        except Exception as e:
+            results.append((html_file, False, str(e)))
+    return results
+
+def subdirectories(path):
+    """Directory entries directly under path in name order, typed from the listing itself"""
+    with os.scandir(path) as entries:
+        return sorted((entry for entry in entries if entry.is_dir()), key=lambda entry: entry.name)
+
 def process_fiji_hansards():
     """Process all Fiji hansards"""
     
@@ -64,6 +96,7 @@ def process_fiji_hansards():
     
     # Convert PDFs to HTML
     html_files = []
+    tasks = []
     for pdf_file in pdf_files:
         base_name = os.path.basename(pdf_file)
         html_name = base_name.replace('.pdf', '.html')
@@ -75,25 +108,38 @@ def process_fiji_hansards():
             html_files.append(html_path)
             continue
         
-        if pdf_to_html(pdf_file, html_path):
-            html_files.append(html_path)
+        tasks.append((pdf_file, html_path))
+    
+    # Parsing is CPU-bound and every PDF is independent, so spread them
+    # across the available cores
+    if tasks:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(pdf_to_html_worker, tasks, chunksize=4))
+        
+        # Report from the main process so the output is not interleaved
+        for (pdf_file, html_path), converted in zip(tasks, results):
+            if converted:
+                logging.info(f"Converted {pdf_file} to {html_path}")
+                html_files.append(html_path)
     
     logging.info(f"Have {len(html_files)} HTML files ready for processing")
     
-    # Process HTML files with the integrated converter
-    processed_count = 0
+    # Process HTML files with the integrated converter. Hansards for the same
+    # day write to the same collection directory, so each day's files stay
+    # together in one worker, in order
+    days = defaultdict(list)
     for html_file in html_files:
-        try:
-            cmd = ['python', 'fiji-hansard-converter-integrated.py', html_file]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                logging.info(f"Successfully processed {os.path.basename(html_file)}")
-                processed_count += 1
-            else:
-                logging.error(f"Error processing {html_file}: {result.stderr}")
-        except Exception as e:
-            logging.error(f"Error running converter: {str(e)}")
+        days[converter.extract_date_from_filename(os.path.basename(html_file))].append(html_file)
+    
+    processed_count = 0
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for results in executor.map(convert_hansards_worker, days.values()):
+            for html_file, processed, error in results:
+                if processed:
+                    logging.info(f"Successfully processed {os.path.basename(html_file)}")
+                    processed_count += 1
+                elif error:
+                    logging.error(f"Error processing {html_file}: {error}")
     
     # Summary
     logging.info("=" * 50)
@@ -105,15 +151,11 @@ def process_fiji_hansards():
     logging.info("\nProcessed hansards:")
     collections_base = "/Users/jacksonkeet/Pacific Hansard Development/collections/Fiji"
     if os.path.exists(collections_base):
-        for year in sorted(os.listdir(collections_base)):
-            year_path = os.path.join(collections_base, year)
-            if os.path.isdir(year_path):
-                logging.info(f"\n{year}:")
-                for month in sorted(os.listdir(year_path)):
-                    month_path = os.path.join(year_path, month)
-                    if os.path.isdir(month_path):
-                        days = sorted(os.listdir(month_path))
-                        logging.info(f"  {month}: {len(days)} days")
+        for year in subdirectories(collections_base):
+            logging.info(f"\n{year.name}:")
+            for month in subdirectories(year.path):
+                days = os.listdir(month.path)
+                logging.info(f"  {month.name}: {len(days)} days")
 
 if __name__ == "__main__":
     process_fiji_hansards()
\ No newline at end of file
@@ -3,8 +3,17 @@
 Process all Fiji hansards - simple version
 """
 import os
-import subprocess
+import sys
 import re
+import importlib.util
+
+# Load the integrated converter once instead of starting python3 per file
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+converter_path = os.path.join(SCRIPT_DIR, "fiji-hansard-converter-integrated.py")
+spec = importlib.util.spec_from_file_location("fiji_hansard_converter_integrated", converter_path)
+converter = importlib.util.module_from_spec(spec)
+sys.modules["fiji_hansard_converter_integrated"] = converter
+spec.loader.exec_module(converter)
 
 def process_all():
     # Get all HTML files
@@ -19,14 +28,11 @@ def process_all():
     for html_file in sorted(html_files):
         print(f"\nProcessing: {html_file}")
         try:
-            # Use python3 explicitly
-            result = subprocess.run(['python3', 'fiji-hansard-converter-integrated.py', html_file], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
+            if converter.process_hansard(html_file):
                 print(f"  ✓ Success")
                 processed += 1
             else:
-                print(f"  ✗ Error: {result.stderr}")
+                print(f"  ✗ Error: could not convert {html_file}")
         except Exception as e:
             print(f"  ✗ Exception: {str(e)}")
     
@@ -1,27 +1,36 @@
 import re
 import os
+import glob
+import json
 import logging
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
+import lxml.html
+from copy import deepcopy
 from datetime import datetime
 import dateparser
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+@lru_cache(maxsize=4096)
 def normalize_name(name):
     # Remove all spaces and convert to uppercase
     return ''.join(name.split()).upper()
 
-def extract_and_clean_speakers(content):
-    soup = BeautifulSoup(content, 'html.parser')
+DATE_PATTERN = re.compile(r'\b\d{1,2}\s+\w+\s+\d{4}\b')  # e.g., '13 February 2021'
+
+# Updated regex pattern to handle double-barreled names and titles with or without periods
+SPEAKER_PATTERN = re.compile(r'^((?:Hon\.?|Professor|Dr\.?|Mr\.?|Mrs\.?|Ms\.?|Madam)\s+[A-Z][A-Za-z\'\.\-]+\s*[\-\–\—])')
+
+def extract_and_clean_speakers(root):
     speakers = []
     seen = set()
-    for p in soup.find_all('p'):
+    for p in root.iter('p'):
         # Get the full text of the paragraph with spaces between elements
-        text = p.get_text(separator=' ').strip()
-        # Updated regex pattern to handle double-barreled names and titles with or without periods
-        pattern = r'^((?:Hon\.?|Professor|Dr\.?|Mr\.?|Mrs\.?|Ms\.?|Madam)\s+[A-Z][A-Za-z\'\.\-]+\s*[\-\–\—])'
-        match = re.match(pattern, text)
+        text = ' '.join(p.itertext()).strip()
+        match = SPEAKER_PATTERN.match(text)
         if match:
             # Extract the name before the hyphen
             name = match.group(1).strip().rstrip('-').strip()
@@ -34,53 +43,64 @@ def extract_and_clean_speakers(content):
 def speaker_str(speakers):
     return "\n".join([f"Speaker {i+1}: {speaker}" for i, speaker in enumerate(speakers)])
 
-def write_speakers_metadata(directory, part_number, part_type, speakers, question_number=None):
-    if question_number is None:
-        filename = os.path.join(directory, f"part{part_number}_metadata.txt")
-    else:
-        questions_dir = os.path.join(directory, f"part{part_number}_questions")
-        os.makedirs(questions_dir, exist_ok=True)
-        filename = os.path.join(questions_dir, f"oral_question_{question_number}_metadata.txt")
-    
-    with open(filename, 'w', encoding='utf-8') as f:
-        if question_number is None:
-            f.write(f"Part {part_number} Speakers:\n")
+def record_speakers(metadata, page_path, speakers):
+    # Speakers are keyed by the page's path relative to the hansard directory
+    metadata[page_path] = speakers
+
+def write_speakers_metadata(directory, metadata):
+    # One speakers.json per hansard instead of a metadata file per page
+    with open(os.path.join(directory, "speakers.json"), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+def parse_fragment(content):
+    # Parse an HTML fragment into a wrapper element
+    return lxml.html.fragment_fromstring(content, create_parent='div')
+
+def fragment_from_elements(elements):
+    # Copy document elements into a wrapper shaped like parse_fragment's output
+    root = lxml.html.Element('div')
+    for element in elements:
+        copy = deepcopy(element)
+        copy.tail = '\n'
+        root.append(copy)
+    if len(root):
+        root[-1].tail = None
+    return root
+
+def serialize_fragment(root):
+    # Serialize the children of a wrapper element built by parse_fragment
+    return (root.text or '') + ''.join(
+        etree.tostring(child, encoding='unicode', method='html') for child in root)
+
+def clean_tree(root):
+    # Clean a parsed fragment in place and return it
+    for tag in root.iterdescendants():
+        if tag.tag == 'img':
+            # Images keep everything but style and class
+            tag.attrib.pop('style', None)
+            tag.attrib.pop('class', None)
         else:
-            f.write(f"{part_type} Question {question_number} Speakers:\n")
-        for i, speaker in enumerate(speakers, 1):
-            f.write(f"Speaker {i}: {speaker}\n")
-        f.write("\n")
-
-def clean_content(content):
-    soup = BeautifulSoup(content, 'html.parser')
-    
-    # Remove all style attributes
-    for tag in soup.find_all(style=True):
-        del tag['style']
-    
-    # Remove all class attributes
-    for tag in soup.find_all(class_=True):
-        del tag['class']
-    
-    # Convert div tags to p tags
-    for div in soup.find_all('div'):
-        div.name = 'p'
+            # Remove all other attributes
+            tag.attrib.clear()
+        
+        # Convert div tags to p tags
+        if tag.tag == 'div':
+            tag.tag = 'p'
     
     # Preserve line breaks
-    for br in soup.find_all("br"):
-        br.replace_with("\n")
+    for br in root.iter('br'):
+        br.tail = '\n' + (br.tail or '')
+    etree.strip_tags(root, 'br')
     
     # Remove empty paragraphs
-    for p in soup.find_all('p'):
-        if len(p.get_text(strip=True)) == 0:
-            p.decompose()
-    
-    # Remove any remaining attributes except 'src' for images
-    for tag in soup.find_all():
-        if tag.name != 'img':
-            tag.attrs = {}
+    for p in list(root.iter('p')):
+        if p is not root and not p.text_content().strip():
+            p.drop_tree()
     
-    return str(soup)
+    return root
+
+def clean_content(content):
+    return serialize_fragment(clean_tree(parse_fragment(content)))
 
 def is_uppercase_heading(element):
     text = get_inner_text(element)
@@ -91,17 +111,20 @@ def is_uppercase_heading(element):
     return is_upper
 
 def split_questions(content):
-    soup = BeautifulSoup(content, 'html.parser')
+    root = parse_fragment(content)
     questions = []
     current_question = []
     
-    for element in soup.find_all(['h3', 'p']):
-        if element.name == 'h3' or (element.name == 'p' and element.find('span') and '-' in element.get_text()):
+    for element in root.iter('h3', 'p'):
+        if element is root:
+            continue
+        element_html = etree.tostring(element, encoding='unicode', method='html', with_tail=False)
+        if element.tag == 'h3' or (element.find('.//span') is not None and '-' in element.text_content()):
             if current_question:
                 questions.append('\n'.join(current_question))
-            current_question = [str(element)]
+            current_question = [element_html]
         else:
-            current_question.append(str(element))
+            current_question.append(element_html)
     
     if current_question:
         questions.append('\n'.join(current_question))
@@ -115,27 +138,31 @@ def parse_padding_left(style):
         return float(value)
     return 0
 
+def element_text(element):
+    # Stripped text of every node in the element, joined with spaces
+    return ' '.join(t.strip() for t in element.itertext() if t.strip())
+
 def get_inner_text(element):
     # Find the <a> tag inside the element
-    a_tag = element.find('a')
-    if a_tag:
-        text = a_tag.get_text(separator=' ', strip=True)
+    a_tag = element.find('.//a')
+    if a_tag is not None and (a_tag.text or len(a_tag)):
+        text = element_text(a_tag)
         logging.debug(f"get_inner_text: Found <a> tag with text '{text}'")
         return text
     else:
         # If there's no <a> tag, get the text from the element itself
-        text = element.get_text(separator=' ', strip=True)
+        text = element_text(element)
         logging.debug(f"get_inner_text: No <a> tag found, using element text '{text}'")
         return text
 
 def is_heading(element):
-    if element.name not in ['p', 'h2', 'h3']:
+    if element.tag not in ['p', 'h2', 'h3']:
         return False
 
     style = element.get('style', '')
     text = get_inner_text(element)
 
-    logging.debug(f"is_heading: Checking element '{text}' with tag '{element.name}' and style '{style}'")
+    logging.debug(f"is_heading: Checking element '{text}' with tag '{element.tag}' and style '{style}'")
 
     # Check for center alignment
     if 'text-align: center' in style:
@@ -144,7 +171,7 @@ def is_heading(element):
 
     # Check for significant padding-left
     padding_left = parse_padding_left(style)
-    if padding_left >= 110 and element.name == 'h3' or element.name == 'h2':
+    if padding_left >= 110 and element.tag == 'h3' or element.tag == 'h2':
         logging.debug(f"is_heading: Found 'padding-left' >= 110 ({padding_left}), returning True")
         return True
 
@@ -160,8 +187,8 @@ def is_heading(element):
         return False
 
     # Consider h2 and h3 tags with text in title case as headings
-    if element.name in ['h2', 'h3'] and text == text.title():
-        logging.debug(f"is_heading: Element is '{element.name}' with title case text, returning True")
+    if element.tag in ['h2', 'h3'] and text == text.title():
+        logging.debug(f"is_heading: Element is '{element.tag}' with title case text, returning True")
         return True
 
     logging.debug("is_heading: None of the conditions met, returning False")
@@ -171,13 +198,13 @@ def is_question_heading(element):
     """
     Determines if the element is a question heading based on specific patterns.
     """
-    if element.name not in ['p', 'h2', 'h3']:
+    if element.tag not in ['p', 'h2', 'h3']:
         return False
 
     text = get_inner_text(element)
     style = element.get('style', '')
 
-    logging.debug(f"is_question_heading: Checking element '{text}' with tag '{element.name}' and style '{style}'")
+    logging.debug(f"is_question_heading: Checking element '{text}' with tag '{element.tag}' and style '{style}'")
 
     # Exclude elements that are purely numeric (e.g., page numbers)
     if is_purely_numeric(text):
@@ -203,13 +230,13 @@ def is_question_heading(element):
     # Check for significant padding-left
     padding_left = parse_padding_left(style)
     
-    if padding_left >= 110 and element.name == 'h3' or element.name == 'h2':
+    if padding_left >= 110 and element.tag == 'h3' or element.tag == 'h2':
         get_inner_text(element)
         return True
 
     # Consider h2 and h3 tags with text in title case as question headings
-    if element.name in ['h2', 'h3'] and text == text.title():
-        logging.debug(f"is_question_heading: Element is '{element.name}' with title case text, returning True")
+    if element.tag in ['h2', 'h3'] and text == text.title():
+        logging.debug(f"is_question_heading: Element is '{element.tag}' with title case text, returning True")
         return True
 
     logging.debug("is_question_heading: None of the conditions met, returning False")
@@ -229,15 +256,14 @@ def is_purely_numeric(text):
     cleaned_text = re.sub(r'[^0-9]', '', text)
     return cleaned_text.isdigit()
 
-def extract_date_from_content(soup):
+def extract_date_from_content(root):
     date_texts = []
     date_elements = []
-    date_pattern = re.compile(r'\b\d{1,2}\s+\w+\s+\d{4}\b')  # e.g., '13 February 2021'
-    for p in soup.find_all('p', style=True):
+    for p in root.iter('p'):
         style = p.get('style', '')
         if 'text-align: center' in style:
-            text = p.get_text(separator=' ', strip=True)
-            if date_pattern.search(text):
+            text = element_text(p)
+            if DATE_PATTERN.search(text):
                 date_obj = dateparser.parse(text)
                 if date_obj:
                     date_str = date_obj.strftime('%Y-%m-%d')
@@ -270,26 +296,26 @@ def write_question(questions_dir, question_number, title, content):
 </html>
     """)
 
-def process_questions(directory, part_number, questions):
+def process_questions(directory, part_number, questions, metadata):
     questions_dir = os.path.join(directory, f"part{part_number}_questions")
     os.makedirs(questions_dir, exist_ok=True)
 
     question_titles = []
 
     for i, (title, content_elements) in enumerate(questions, 1):
-        question_content = "\n".join(content_elements)
-        cleaned_content = clean_content(question_content)
-        write_question(questions_dir, i, title, cleaned_content)
-        speakers = extract_and_clean_speakers(cleaned_content)
-        # Pass "Oral" as the part_type since we are using 'oral_question_' prefix
-        write_speakers_metadata(directory, part_number, "Oral", speakers, i)
+        # Build the cleaned tree once and reuse it for both the page and the speakers
+        question_tree = clean_tree(fragment_from_elements(content_elements))
+        write_question(questions_dir, i, title, serialize_fragment(question_tree))
+        speakers = extract_and_clean_speakers(question_tree)
+        record_speakers(metadata, f"part{part_number}_questions/oral_question_{i}.html", speakers)
         question_titles.append(title)
 
     return question_titles
 
-def write_part(directory, part_number, content):
+def write_part(directory, part_number, content, metadata):
     part_filename = os.path.join(directory, f"part{part_number}.html")
-    cleaned_content = clean_content("\n".join(content))
+    part_tree = clean_tree(fragment_from_elements(content))
+    cleaned_content = serialize_fragment(part_tree)
     with open(part_filename, "w", encoding='utf-8') as part_file:
         part_file.write(f"""
 <!DOCTYPE html>
@@ -309,33 +335,33 @@ def write_part(directory, part_number, content):
 </body>
 </html>
     """)
-    speakers = extract_and_clean_speakers(cleaned_content)
-    write_speakers_metadata(directory, part_number, "Part", speakers)
+    speakers = extract_and_clean_speakers(part_tree)
+    record_speakers(metadata, f"part{part_number}.html", speakers)
 
 def split_html(filename):
     # Load the HTML content
-    with open(filename, "r", encoding='utf-8') as file:
-        soup = BeautifulSoup(file, 'html.parser')
+    root = lxml.html.parse(filename, lxml.html.HTMLParser(encoding='utf-8')).getroot()
     
     # Extract the date from the content and get all date elements
-    date_str, date_elements = extract_date_from_content(soup)
+    date_str, date_elements = extract_date_from_content(root)
     logging.info(f"Extracted date: {date_str}")
     
     # Create the directory using the date
     directory_name = f"Hansard_{date_str}"
     os.makedirs(directory_name, exist_ok=True)
     
-    all_elements = soup.find_all(['p', 'h2', 'h3'])
+    all_elements = list(root.iter('p', 'h2', 'h3'))
     logging.info(f"Total elements found: {len(all_elements)}")
     
     # Find the indices of the date elements in all_elements
     date_indices = []
+    # A repeated date line resolves to its first identical copy
     for date_el in date_elements:
-        try:
-            index = all_elements.index(date_el)
+        date_markup = etree.tostring(date_el, with_tail=False)
+        index = next((i for i, el in enumerate(all_elements)
+                      if el is date_el or etree.tostring(el, with_tail=False) == date_markup), None)
+        if index is not None:
             date_indices.append(index)
-        except ValueError:
-            continue  # date_el not in all_elements
     
     if len(date_indices) >= 2:
         # Start parsing from the element after the second date occurrence
@@ -357,13 +383,14 @@ def split_html(filename):
     question_title = None
     contents_structure = []
     current_part_title = ""
+    speakers_metadata = {}
     
     i = 0
     while i < len(all_elements):
         element = all_elements[i]
         text = get_inner_text(element)
         style = element.get('style', '')
-        element_tag = element.name
+        element_tag = element.tag
         logging.debug(f"Processing element at index {i}: '{text}' with tag '{element_tag}'")
 
         if is_heading(element):
@@ -377,7 +404,7 @@ def split_html(filename):
                 next_element = all_elements[i + 1]
                 next_text = get_inner_text(next_element).strip()
                 next_style = next_element.get('style', '')
-                next_tag = next_element.name
+                next_tag = next_element.tag
 
                 if is_heading(next_element) and next_tag == heading_tag and next_style == heading_style:
                     i += 1
@@ -394,14 +421,14 @@ def split_html(filename):
                     if question_title and current_question:
                         questions.append((question_title, current_question))
                     if questions:
-                        process_questions(directory_name, part_number, questions)
+                        process_questions(directory_name, part_number, questions, speakers_metadata)
                         contents_structure.append(("QUESTIONS", [q[0] for q in questions]))
                     in_questions_section = False
                     question_title = None
                     current_question = []
                     # Start a new part with the current heading
                     part_number += 1
-                    current_part = [str(element)]
+                    current_part = [element]
                     current_part_title = heading_text
                 elif is_question_heading(element):
                     heading_text = text.strip()
@@ -410,18 +437,16 @@ def split_html(filename):
                         # Save the previous question
                         questions.append((question_title, current_question))
                     question_title = heading_text
-                    current_question = [str(element)]
+                    current_question = [element]
                 else:
                     # This is a heading but not a question heading; include in current question
-                    current_question.append(str(element))
+                    current_question.append(element)
             else:
                 # Outside of questions section
                 if heading_text.upper() == "QUESTIONS":
                     # Save the current part before entering the questions section
                     if current_part:
-                        write_part(directory_name, part_number, current_part)
-                        speakers = extract_and_clean_speakers("\n".join(current_part))
-                        write_speakers_metadata(directory_name, part_number, "Part", speakers)
+                        write_part(directory_name, part_number, current_part, speakers_metadata)
                         contents_structure.append((current_part_title, []))
                         current_part = []
 
@@ -434,19 +459,17 @@ def split_html(filename):
                 else:
                     # Start a new part
                     if current_part:
-                        write_part(directory_name, part_number, current_part)
-                        speakers = extract_and_clean_speakers("\n".join(current_part))
-                        write_speakers_metadata(directory_name, part_number, "Part", speakers)
+                        write_part(directory_name, part_number, current_part, speakers_metadata)
                         contents_structure.append((current_part_title, []))
                     part_number += 1
-                    current_part = [str(element)]
+                    current_part = [element]
                     current_part_title = heading_text
         else:
             # Non-heading elements
             if in_questions_section:
-                current_question.append(str(element))
+                current_question.append(element)
             else:
-                current_part.append(str(element))
+                current_part.append(element)
         i += 1
 
     # Process any remaining content
@@ -454,45 +477,78 @@ def split_html(filename):
         if question_title and current_question:
             questions.append((question_title, current_question))
         if questions:
-            process_questions(directory_name, part_number, questions)
+            process_questions(directory_name, part_number, questions, speakers_metadata)
             contents_structure.append(("QUESTIONS", [q[0] for q in questions]))
     if current_part:
-        write_part(directory_name, part_number, current_part)
-        speakers = extract_and_clean_speakers("\n".join(current_part))
-        write_speakers_metadata(directory_name, part_number, "Part", speakers)
+        write_part(directory_name, part_number, current_part, speakers_metadata)
         contents_structure.append((current_part_title, []))
 
+    write_speakers_metadata(directory_name, speakers_metadata)
+
     # Write the contents structure
+    contents = ["<h2>Contents</h2>\n<ul>"]
+    for item in contents_structure:
+        if item[0] == "QUESTIONS":
+            contents.append("<li>QUESTIONS<ul>")
+            contents.extend(f"<li>{title}</li>" for title in item[1])
+            contents.append("</ul></li>")
+        else:
+            contents.append(f"<li>{item[0]}</li>")
+    contents.append("</ul>")
     with open(os.path.join(directory_name, "contents.html"), "w", encoding='utf-8') as file:
-        file.write("<h2>Contents</h2>\n<ul>")
-        for item in contents_structure:
-            if item[0] == "QUESTIONS":
-                file.write(f"<li>QUESTIONS<ul>")
-                for title in item[1]:
-                    file.write(f"<li>{title}</li>")
-                file.write("</ul></li>")
-            else:
-                file.write(f"<li>{item[0]}</li>")
-        file.write("</ul>")
+        file.write(''.join(contents))
 
     logging.info(f"Total parts processed: {part_number}")
     return contents_structure  # Return this for debugging purposes
 
 def extract_question_title(question):
-    soup = BeautifulSoup(question, 'html.parser')
-    title = soup.find('h3')
-    if title:
-        return title.text.strip()
+    root = parse_fragment(question)
+    title = root.find('.//h3')
+    if title is not None:
+        return title.text_content().strip()
     else:
         # If no h3, try to find the first paragraph or span
-        first_p = soup.find('p')
-        if first_p:
-            return first_p.text.strip().split('\n')[0]  # Take only the first line
-        first_span = soup.find('span')
-        if first_span:
-            return first_span.text.strip().split('\n')[0]  # Take only the first line
+        first_p = root.find('.//p')
+        if first_p is not None:
+            return first_p.text_content().strip().split('\n')[0]  # Take only the first line
+        first_span = root.find('.//span')
+        if first_span is not None:
+            return first_span.text_content().strip().split('\n')[0]  # Take only the first line
     return None  # Return None instead of "Untitled Question"
 
+def convert_file(filename):
+    # Worker entry point: one failed hansard should not abort the whole batch
+    try:
+        split_html(filename)
+        return True
+    except Exception as e:
+        logging.error(f"Error processing {filename}: {str(e)}")
+        return False
+
+def sitting_date(filename):
+    # The output directory is named after this date, or None if the file cannot be read
+    try:
+        root = lxml.html.parse(filename, lxml.html.HTMLParser(encoding='utf-8')).getroot()
+        return extract_date_from_content(root)[0]
+    except Exception as e:
+        logging.error(f"Error reading the date of {filename}: {str(e)}")
+        return None
+
+def convert_group(filenames):
+    # Files from the same sitting share Hansard_{date}, so they run one after another
+    return sum(convert_file(filename) for filename in filenames)
+
+def main():
+    # Sittings are independent, so spread them across the available cores
+    files = sorted(glob.glob("*.html"))
+    logging.info(f"Found {len(files)} HTML files to convert")
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        dates = executor.map(sitting_date, files, chunksize=4)
+        groups = {}
+        for filename, date_str in zip(files, dates):
+            groups.setdefault(date_str or filename, []).append(filename)
+        results = list(executor.map(convert_group, groups.values()))
+    logging.info(f"Converted {sum(results)} of {len(files)} files")
+
 if __name__ == "__main__":
-    filename = "content.html"
-    split_html(filename)
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -18,10 +18,10 @@ def preprocess_image(img):
     
     return Image.fromarray(threshold_img)
 
-# Extract text from a scanned PDF using Tesseract OCR
-def extract_text_from_pdf(pdf_file):
+# Extract text from a scanned PDF using Tesseract OCR, writing each page to
+# the output file as soon as it is read rather than holding the whole text
+def extract_text_from_pdf(pdf_file, text_file):
     with pdfplumber.open(pdf_file) as pdf:
-        extracted_text = ""
         for page_num, page in enumerate(pdf.pages):
             # Convert the page to an image
             image = page.to_image()
@@ -33,15 +33,13 @@ def extract_text_from_pdf(pdf_file):
             # Perform OCR on the preprocessed image
             text = pytesseract.image_to_string(preprocessed_img)
 
-            extracted_text += f"Page {page_num + 1}:\n{text}\n\n"
-    return extracted_text
+            text_file.write(f"Page {page_num + 1}:\n{text}\n\n")
 
 # Main workflow
 pdf_file = "H-11-20230314-M06-D01.pdf"
-extracted_text = extract_text_from_pdf(pdf_file)
 
 # Save the extracted text to a file
 with open("test3.txt", "w", encoding="utf-8") as text_file:
-    text_file.write(extracted_text)
+    extract_text_from_pdf(pdf_file, text_file)
 
 print("OCR with preprocessing completed and saved to output.txt")
\ No newline at end of file
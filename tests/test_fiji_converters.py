@@ -0,0 +1,59 @@
+"""Checks for the streaming Fiji hansard converters"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+from bs4 import BeautifulSoup
+
+FIJI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'Fiji')
+
+# Divs nested in divs, with text both before and after the inner ones
+NESTED_DIVS = """<html><body>
+<div><span style="font-family: Bold">PRAYER</span></div>
+<div><p>Before the inner div.</p>
+  <div><p>Inner one.</p></div>
+  <p>Between the inner divs.</p>
+  <div><p>Inner two.</p><div><p>Innermost.</p></div></div>
+  <p>After the inner divs.</p>
+</div>
+<div><span style="font-family: Bold">QUESTIONS</span></div>
+<div><p>HON. J. USAMATE.- Question text.</p></div>
+</body></html>
+"""
+
+def load_converter(name):
+    """Import a converter script, whose file name is not a valid module name"""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), os.path.join(FIJI_DIR, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def nested_hansard(tmp_path):
+    path = tmp_path / 'Daily-Hansard-Monday-8th-February-2021.html'
+    path.write_text(NESTED_DIVS, encoding='utf-8')
+    return str(path)
+
+def baseline_texts(input_file):
+    """Div texts, whitespace collapsed, as the original BeautifulSoup converters saw them"""
+    with open(input_file, encoding='utf-8') as f:
+        return [' '.join(div.get_text().split()) for div in BeautifulSoup(f.read(), 'html.parser').find_all('div')]
+
+@pytest.mark.parametrize('name, blocks', [
+    ('fiji-hansard-converter-integrated', 'iter_divs'),
+    ('fiji-hansard-converter-enhanced', 'iter_content_blocks'),
+])
+def test_nested_divs_match_baseline(nested_hansard, name, blocks):
+    converter = load_converter(name)
+    texts = [' '.join(''.join(div.itertext()).split()) for div in getattr(converter, blocks)(nested_hansard)]
+    assert texts == baseline_texts(nested_hansard)
+
+def test_nested_div_text_reaches_output(nested_hansard, tmp_path):
+    converter = load_converter('fiji-hansard-converter-integrated')
+    assert converter.process_hansard(nested_hansard, str(tmp_path / 'out'))
+    with open(tmp_path / 'out' / '2021' / 'February' / '8' / 'part1.html', encoding='utf-8') as f:
+        part = f.read()
+    for text in ('Before the inner div.', 'Between the inner divs.', 'Innermost.', 'After the inner divs.'):
+        assert text in part
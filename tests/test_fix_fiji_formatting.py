@@ -0,0 +1,36 @@
+"""Checks for the line-break joining in fix_fiji_formatting"""
+
+import importlib.util
+import os
+
+import pytest
+
+FIJI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'Fiji')
+
+@pytest.fixture
+def formatting(tmp_path, monkeypatch):
+    """Import the script from a scratch directory, since it opens its log file there"""
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location('fix_fiji_formatting',
+                                                  os.path.join(FIJI_DIR, 'fix_fiji_formatting.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.mark.parametrize('html, expected', [
+    # Letters on both sides, ASCII or not, join
+    ('<p>Prime<br/>Minister</p>', '<p>Prime Minister</p>'),
+    ('<p>Sukunā<br/>ōna</p>', '<p>Sukunā ōna</p>'),
+    ('<p>Tui Cakau\n<br>\nNaiqama</p>', '<p>Tui Cakau Naiqama</p>'),
+    # Text in the elements right before and after the break counts too
+    ('<p><span>Hon. Prime</span><br/><span>Minister</span></p>', '<p><span>Hon. Prime</span> <span>Minister</span></p>'),
+    ('<p><b>Bainimaramā</b><br/>spoke</p>', '<p><b>Bainimaramā</b> spoke</p>'),
+    # Punctuation, quotes and underscores on either side keep the break
+    ('<p>adjourned.<br/>Next</p>', '<p>adjourned.<br/>Next</p>'),
+    ('<p>said<br/>“Order”</p>', '<p>said<br/>“Order”</p>'),
+    ('<p>item_<br/>two</p>', '<p>item_<br/>two</p>'),
+    # So does whitespace between a tag and the break
+    ('<p><span>Prime</span>\n<br/>Minister</p>', '<p><span>Prime</span>\n<br/>Minister</p>'),
+])
+def test_line_break_in_text(formatting, html, expected):
+    assert formatting.LINE_BREAK_IN_TEXT_PATTERN.sub(r'\1 \2', html) == expected